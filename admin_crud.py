@@ -4,6 +4,11 @@ from flask_login import current_user, login_required
 from app import db
 from forms import BranchForm, SubjectForm, ChapterForm, QuizForm, QuestionForm, UserForm
 from models import Branch, Subject, Chapter, Quiz, Question, User
+from answer_keys import invalidate_answer_key
+from search_index import search
+from pagination import paginate_from_request
+from identity_cache import invalidate_identity
+from bulk_ops import delete_items
 
 
 admin_bp = Blueprint('admin', __name__)
@@ -21,6 +26,16 @@ def admin_login_required(func):
         return func(*args, **kwargs)
     return decorated_view
 
+# Quiz ids whose compiled answer key depends on this item
+def answer_key_quiz_ids(model, item):
+    if item is None:
+        return []
+    if model == "quizzes":
+        return [item.id]
+    if model == "questions":
+        return [item.quiz_id]
+    return []
+
 # Generic CRUD handler
 @admin_bp.route("/admin/manage/<string:model>", methods=['GET', 'POST'])
 @admin_login_required
@@ -48,14 +63,16 @@ def handle_crud(model):
 
     ModelClass = model_map[model]  # Get the model class
     FormClass = form_map[model]    # Get the form class
-    items = ModelClass.query.all()  # Fetch all records
+    page = paginate_from_request(ModelClass.query, ModelClass.id)  # Fetch one page of records
+    items = page.items
     query = request.form.get('query', '')
 
     # Search functionality
     if request.method == 'POST':
-        items = ModelClass.query.filter(ModelClass.name.ilike(f"%{query}%")).all()
+        items = search(ModelClass, query) if ModelClass in (Subject, Chapter, Quiz, Question) \
+            else ModelClass.query.filter(ModelClass.name.ilike(f"%{query}%")).all()
 
-    return render_template(f"admin/{model}/manage.html", items=items, query=query, model=model)
+    return render_template(f"admin/{model}/manage.html", items=items, page=page, query=query, model=model)
 
 # Generic Add/Edit Function
 @admin_bp.route("/admin/<string:model>/edit/<int:id>", methods=['GET', 'POST'])
@@ -89,6 +106,7 @@ def add_edit_item(model, id=None):
     form = FormClass(obj=item)
 
     if form.validate_on_submit():
+        stale_quiz_ids = answer_key_quiz_ids(model, item)
         if not item:
             item = ModelClass()
             db.session.add(item)
@@ -98,6 +116,7 @@ def add_edit_item(model, id=None):
                 setattr(item, field, form.data[field])
 
         db.session.commit()
+        invalidate_answer_key(*stale_quiz_ids, *answer_key_quiz_ids(model, item))
         flash(f"{model.capitalize()} {'updated' if id else 'added'} successfully!", category="success")
         return redirect(url_for("admin.handle_crud", model=model))
 
@@ -121,11 +140,13 @@ def edit_item_inline(model, id):
 
     ModelClass = model_map[model]
     item = ModelClass.query.get_or_404(id)
+    stale_quiz_ids = answer_key_quiz_ids(model, item)
 
     for field in request.form:
         setattr(item, field, request.form[field])  # Dynamically update fields
 
     db.session.commit()
+    invalidate_answer_key(*stale_quiz_ids, *answer_key_quiz_ids(model, item))
     return "", 204  # Return empty response for inline edit
 
 
@@ -133,6 +154,13 @@ def edit_item_inline(model, id):
 @admin_bp.route("/admin/<string:model>/delete/<int:id>", methods=['POST'])
 @admin_login_required
 def delete_item(model, id):
+    bulk_levels = {
+        "branches": "branch",
+        "subjects": "subject",
+        "chapters": "chapter",
+        "quizzes": "quiz",
+        "questions": "question"
+    }
     model_map = {
         "branches": Branch,
         "subjects": Subject,
@@ -147,24 +175,29 @@ def delete_item(model, id):
 
     ModelClass = model_map[model]
     item = ModelClass.query.get_or_404(id)
-    
-    db.session.delete(item)
-    db.session.commit()
-    flash(f"{model.capitalize()} deleted successfully!", category="success")
+
+    # Set-based cascade through everything under the item (see bulk_ops.py)
+    try:
+        delete_items(bulk_levels[model], [item.id])
+        flash(f"{model.capitalize()} deleted successfully!", category="success")
+    except ValueError as e:
+        db.session.rollback()
+        flash(str(e), category="error")
     return redirect(url_for("admin.handle_crud", model=model))
 
 # Manage Users Page
 @users_bp.route("/admin/manage/users", methods=['GET', 'POST'])
 @admin_login_required
 def manage_users():
-    users = User.query.all()
+    page = paginate_from_request(User.query, User.id)
+    users = page.items
     query = request.form.get('query', '')
 
     # Search Functionality
     if request.method == 'POST':
-        users = User.query.filter(User.username.ilike(f"%{query}%")).all()
+        users = search(User, query)
 
-    return render_template("admin/users/manage.html", users=users, query=query)
+    return render_template("admin/users/manage.html", users=users, page=page, query=query)
 
 # Add or Edit User
 @users_bp.route("/admin/users/edit/<int:id>", methods=['GET', 'POST'])
@@ -184,6 +217,7 @@ def add_edit_user(id=None):
                 setattr(user, field, form.data[field])
 
         db.session.commit()
+        invalidate_identity(user.id)
         flash(f"User {'updated' if id else 'added'} successfully!", category="success")
         return redirect(url_for("users.manage_users"))
 
@@ -199,6 +233,7 @@ def edit_user_inline(id):
         setattr(user, field, request.form[field])
 
     db.session.commit()
+    invalidate_identity(id)
     return "", 204  # Empty response for inline edit
 
 # Delete User
@@ -209,6 +244,7 @@ def delete_user(id):
     
     db.session.delete(user)
     db.session.commit()
+    invalidate_identity(id)
     flash("User deleted successfully!", category="success")
     return redirect(url_for("users.manage_users"))
 
@@ -0,0 +1,108 @@
+from array import array
+from bisect import bisect_left
+from threading import Lock
+from models import db, Quiz, Question
+
+# ⪼ Compiled answer keys
+# Grading only needs (question_id, ans, marks) per quiz, so we compile those into
+# compact arrays once and keep them per process until the quiz changes. Every worker
+# checks its cached key against Quiz.version (bumped on any quiz or question edit, see
+# quiz_versions.py), so an edit made through another worker is never graded stale.
+
+class AnswerKey:
+    __slots__ = ("quiz_id", "version", "question_ids", "answers", "marks", "fields", "values", "total_marks")
+
+    def __init__(self, quiz_id, rows, version=None):
+        self.quiz_id = quiz_id
+        self.version = version
+        self.question_ids = array('q', (row[0] for row in rows))
+        self.answers = array('b', (row[1] for row in rows))
+        self.marks = array('l', (row[2] for row in rows))
+        # Precomputed form field names and expected radio values, so grading is a plain string compare
+        self.fields = tuple(f"question_{qid}" for qid in self.question_ids)
+        self.values = tuple(str(ans) for ans in self.answers)
+        self.total_marks = sum(self.marks)
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def subset(self, question_ids):
+        # Key restricted to the given questions (an attempt's drawn set), found by bisection: O(k log n)
+        rows = []
+        for qid in sorted(question_ids):
+            i = bisect_left(self.question_ids, qid)
+            if i < len(self.question_ids) and self.question_ids[i] == qid:  # Skips questions deleted since
+                rows.append((qid, self.answers[i], self.marks[i]))
+        return AnswerKey(self.quiz_id, rows, self.version)
+
+
+_keys = {}
+_lock = Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+_generation = 0  # Bumped on every invalidation so a key compiled mid-edit is never stored
+
+
+def get_answer_key(quiz_id):
+    version = db.session.query(Quiz.version).filter(Quiz.id == quiz_id).scalar()  # Primary-key lookup
+    key = _keys.get(quiz_id)
+    if key is not None and key.version == version:
+        with _lock:
+            _stats["hits"] += 1
+        return key
+
+    generation = _generation
+    rows = db.session.query(Question.id, Question.ans, Question.marks) \
+        .filter(Question.quiz_id == quiz_id) \
+        .order_by(Question.id).all()
+    key = AnswerKey(quiz_id, rows, version)
+
+    with _lock:
+        _stats["misses"] += 1
+        if generation == _generation:
+            _keys[quiz_id] = key
+    return key
+
+
+def invalidate_answer_key(*quiz_ids):
+    # Called from every admin write path touching quizzes/questions; frees this worker's copy
+    # right away, the version check in get_answer_key covers the other workers
+    global _generation
+    with _lock:
+        _generation += 1
+        for quiz_id in {int(q) for q in quiz_ids if q is not None}:
+            _keys.pop(quiz_id, None)
+            _stats["invalidations"] += 1
+
+
+def answer_key_generation():
+    # Changes whenever any key is invalidated, i.e. after any quiz or question edit
+    return _generation
+
+
+def clear_answer_keys():
+    global _generation
+    with _lock:
+        _generation += 1
+        _stats["invalidations"] += len(_keys)
+        _keys.clear()
+
+
+def grade_submission(key, form):
+    # Scores a submitted quiz form against a compiled key, without touching the ORM
+    score = 0
+    for field, value, marks in zip(key.fields, key.values, key.marks):
+        if form.get(field) == value:
+            score += marks
+    return score
+
+
+_OPTIONS = {"1": 1, "2": 2, "3": 3, "4": 4}
+
+def selected_options(key, form):
+    # Per-question selections for the attempt, None where the question was left unanswered
+    return [(qid, _OPTIONS.get(form.get(field))) for qid, field in zip(key.question_ids, key.fields)]
+
+
+def answer_key_stats():
+    with _lock:
+        return dict(_stats, cached_quizzes=len(_keys))
@@ -0,0 +1,176 @@
+import hashlib
+from functools import wraps
+from flask import Blueprint, request, current_app
+from flask_login import current_user, login_user, logout_user
+from flask_restful import Api, Resource, abort
+from models import db, User, Subject, Quiz, Question, Score, QuizAttempt
+from question_sampling import drawn_question_ids, attempt_key
+from quiz_attempts import find_open_attempt, open_attempt, submit_attempt
+from user_stats import get_user_stats, top_subject
+from compression import etag_matches
+
+# ⪼ JSON API, version 1 (/api/v1)
+# Session-cookie auth via POST /api/v1/session. Quiz payloads carry strong ETags built from
+# Quiz.version, so a client that sends If-None-Match gets an empty 304 when nothing changed.
+# Quizzes are taken through attempts, like the HTML pages: fetching a quiz opens (or resumes) the
+# caller's attempt, which carries the Quiz.nos questions drawn for it, and submitting grades that
+# attempt once. The quiz ETag names the attempt as well, so a 304 is only ever sent for the open
+# attempt the client already has, and revalidating never writes.
+
+api_v1 = Blueprint("api_v1", __name__, url_prefix="/api/v1")
+api = Api(api_v1)
+
+
+def authenticated(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not current_user.is_authenticated:
+            abort(401, message="Log in first (POST /api/v1/session).")
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def conditional(etag, build):
+    # build() is only called when the client's cached copy is stale
+    if etag_matches(request.if_none_match, etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = api.make_response(build(), 200)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"  # Always revalidate; a 304 is nearly free
+    return response
+
+
+def quiz_etag(quiz_id, version, attempt=None):
+    # The payload carries the attempt id (and a sampled attempt's own question set), so the ETag names it too
+    if attempt is not None:
+        return f"quiz-{quiz_id}-v{version}-a{attempt.id}"
+    return f"quiz-{quiz_id}-v{version}"
+
+
+def own_attempt(quiz, attempt_id=None):
+    # The named attempt of the caller at this quiz, or their open one (a new draw if there's none)
+    if attempt_id is None:
+        return open_attempt(current_user.id, quiz.id, quiz.nos)
+    attempt = db.session.get(QuizAttempt, attempt_id)
+    if attempt is None or attempt.user_id != current_user.id or attempt.quiz_id != quiz.id:
+        abort(404, message=f"Attempt {attempt_id} doesn't exist.")
+    return attempt
+
+
+# ⪼ Session (login / logout)
+class SessionResource(Resource):
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        user = User.query.filter_by(username=data.get("username", "")).first()
+        if not user or not user.check_password(data.get("password", "")):
+            abort(401, message="Invalid username or password.")
+        login_user(user)
+        return {"id": user.id, "username": user.username, "is_admin": bool(user.is_admin)}
+
+    @authenticated
+    def delete(self):
+        logout_user()
+        return "", 204
+
+
+# ⪼ Quizzes of a branch
+class BranchQuizzes(Resource):
+    method_decorators = [authenticated]
+
+    def get(self, branch_id):
+        if not current_user.is_admin and current_user.branch_id != branch_id:
+            abort(403, message="Students can only list quizzes of their own branch.")
+
+        rows = db.session.query(Quiz.id, Quiz.name, Quiz.subject_id, Quiz.chapter_id, Quiz.nos, Quiz.time,
+                                Quiz.version) \
+            .join(Subject, Subject.id == Quiz.subject_id) \
+            .filter(Subject.branch_id == branch_id).order_by(Quiz.id).all()
+        # The list changes when a quiz is added, removed or edited: hash every (id, version) pair
+        digest = hashlib.sha1(",".join(f"{row.id}:{row.version}" for row in rows).encode()).hexdigest()[:16]
+
+        return conditional(f"branch-{branch_id}-{digest}", lambda: {"quizzes": [
+            {"id": row.id, "name": row.name, "subject_id": row.subject_id, "chapter_id": row.chapter_id,
+             "questions": row.nos, "time": row.time, "version": row.version}
+            for row in rows
+        ]})
+
+
+# ⪼ One quiz with the questions of the caller's attempt (never the answers)
+class QuizDetail(Resource):
+    method_decorators = [authenticated]
+
+    def get(self, quiz_id):
+        quiz = db.session.query(Quiz.id, Quiz.name, Quiz.nos, Quiz.time, Quiz.version).filter(Quiz.id == quiz_id).first()
+        if quiz is None:
+            abort(404, message=f"Quiz {quiz_id} doesn't exist.")
+        attempt = find_open_attempt(current_user.id, quiz.id)
+        if attempt is None:
+            # No cached copy can name an attempt that doesn't exist yet, so this is a 200 either way
+            attempt = open_attempt(current_user.id, quiz.id, quiz.nos)
+        drawn = drawn_question_ids(attempt)
+
+        def build():
+            query = db.session.query(Question.id, Question.question_text, Question.option1, Question.option2,
+                                     Question.option3, Question.option4, Question.marks)
+            query = query.filter(Question.quiz_id == quiz_id) if drawn is None else query.filter(Question.id.in_(drawn))
+            return {"id": quiz.id, "name": quiz.name, "time": quiz.time, "version": quiz.version,
+                    "attempt_id": attempt.id, "questions": [
+                        {"id": q.id, "text": q.question_text, "options": [q.option1, q.option2, q.option3, q.option4],
+                         "marks": q.marks}
+                        for q in query.order_by(Question.id)
+                    ]}
+
+        return conditional(quiz_etag(quiz.id, quiz.version, attempt), build)
+
+
+# ⪼ Submit answers: {"attempt_id": <id from the quiz payload>, "answers": {"<question_id>": <option 1-4>, ...}}
+# Without attempt_id, the caller's open attempt is graded (a new one is opened if there's none).
+class QuizSubmissions(Resource):
+    method_decorators = [authenticated]
+
+    def post(self, quiz_id):
+        quiz = db.session.query(Quiz.id, Quiz.subject_id, Quiz.nos, Quiz.version).filter(Quiz.id == quiz_id).first()
+        if quiz is None:
+            abort(404, message=f"Quiz {quiz_id} doesn't exist.")
+
+        data = request.get_json(silent=True) or {}
+        answers, attempt_id = data.get("answers"), data.get("attempt_id")
+        if not isinstance(answers, dict) or not (attempt_id is None or isinstance(attempt_id, int)):
+            abort(400, message='Expected {"attempt_id": <id>, "answers": {"<question_id>": <option>}}.')
+        attempt = own_attempt(quiz, attempt_id)
+        if attempt.submitted_at is not None:
+            abort(409, message="This attempt has already been submitted.")
+        # Optional If-Match: refuse answers given against an older version of the quiz
+        if request.if_match and not etag_matches(request.if_match, quiz_etag(quiz.id, quiz.version, attempt)):
+            abort(412, message="The quiz changed since it was fetched; fetch it again.")
+
+        # Graded against the attempt's drawn questions only; answers to other questions are ignored
+        form = {f"question_{question_id}": str(option) for question_id, option in answers.items()}
+        score = submit_attempt(current_app._get_current_object(), attempt, quiz.subject_id, form=form)
+        return {"quiz_id": quiz.id, "attempt_id": attempt.id, "score": score,
+                "total_marks": attempt_key(attempt).total_marks}, 201
+
+
+# ⪼ Profile stats of the logged-in user
+class ProfileStats(Resource):
+    method_decorators = [authenticated]
+
+    def get(self):
+        stats = get_user_stats(current_user.id)
+        top = top_subject(current_user.id)
+        attempts = db.session.query(Quiz.id, Quiz.name, Score.score).join(Quiz, Quiz.id == Score.quiz_id) \
+            .filter(Score.user_id == current_user.id).order_by(Score.id).all()
+        return {
+            "attempts": stats.attempts,
+            "total_score": stats.total_score,
+            "top_subject": {"name": top.subject, "score": top.score} if top else None,
+            "quiz_attempts": [{"quiz_id": row.id, "quiz_name": row.name, "score": row.score} for row in attempts],
+        }
+
+
+api.add_resource(SessionResource, "/session")
+api.add_resource(BranchQuizzes, "/branches/<int:branch_id>/quizzes")
+api.add_resource(QuizDetail, "/quizzes/<int:quiz_id>")
+api.add_resource(QuizSubmissions, "/quizzes/<int:quiz_id>/submissions")
+api.add_resource(ProfileStats, "/profile")
@@ -1,14 +1,32 @@
 from flask import Flask
 from config import Config
-from models import db, User, setup_database
+from db_profile import init_engine
+from models import setup_database
 from routes import routes_bp, admin_bp
+from api import api_v1
 from commands import register_commands
+from search_index import setup_search_index
+from leaderboards import setup_leaderboards
+from identity_cache import load_identity
+from instrumentation import init_metrics, setup_logging
+from assets import init_assets
+from compression import init_compression
+from fragment_cache import init_fragment_cache
+from profiler import init_profiler
+import strict_loading  # ⪼ Registers the lazy-load guard on ORM sessions (see STRICT_LOADING)
+import quiz_versions  # ⪼ Bumps Quiz.version on every quiz/question edit
 from flask_login import LoginManager
 
 
 app = Flask(__name__)
 app.config.from_object(Config)
-db.init_app(app)
+init_engine(app)  # ⪼ db.init_app with the SQLite engine profile (pragmas, pool) applied
+setup_logging(app)
+init_metrics(app)  # ⪼ Request latency, SQL and template timings for /admin/metrics
+init_assets(app)  # ⪼ asset_url() for fingerprinted static files, cached for a year
+init_compression(app)  # ⪼ brotli/gzip for HTML and JSON above COMPRESS_MIN_SIZE
+init_fragment_cache(app)  # ⪼ {% cache %} template fragments and the on-disk Jinja bytecode cache
+init_profiler(app)  # ⪼ Admin-toggled cProfile and stack sampling of requests (see /admin/profiler)
 
 #a debug test to see if the app is running 
 #print("DEBUG:", app.config["DEBUG"])
@@ -21,17 +39,25 @@ login_manager.init_app(app)
 login_manager.login_view = "routes.login"  # Redirect unauthorized users
 
 # ⪼ User loader function (Required for Flask-Login)
+# Returns a cached identity snapshot; see identity_cache.py
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return load_identity(int(user_id))
 
 # ⪼ Import routes and register Blueprint after app is initialized
 app.register_blueprint(routes_bp, url_prefix="")  # No prefix ensures root-level routes
 app.register_blueprint(admin_bp)
+app.register_blueprint(api_v1)  # ⪼ JSON API under /api/v1 (see api.py)
 
 # Initialize Database & Create Admin
 setup_database(app)
 
+# ⪼ Full-text search tables and triggers (SQLite FTS5)
+setup_search_index(app)
+
+# ⪼ Build leaderboards for scores recorded before they existed
+setup_leaderboards(app)
+
 # ⪼ Register CLI commands
 register_commands(app)
 
@@ -0,0 +1,50 @@
+import hashlib
+import os
+from threading import Lock
+from flask import current_app, request, url_for
+
+# ⪼ Fingerprinted static assets
+# Templates link their stylesheets with asset_url('css/...'), which adds a content hash (?v=...).
+# A URL therefore never changes meaning, so a fingerprinted request can be cached by the browser
+# for STATIC_MAX_AGE with "immutable"; editing the file changes the hash and the URL.
+
+_digests = {}  # filename -> (mtime_ns, digest)
+_lock = Lock()
+
+
+def asset_digest(filename):
+    path = os.path.join(current_app.static_folder, filename)
+    cached = _digests.get(filename)
+    if cached is not None and not current_app.debug:
+        return cached[1]  # Files don't change under a running production process
+
+    mtime = os.stat(path).st_mtime_ns
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+    with _lock:
+        _digests[filename] = (mtime, digest)
+    return digest
+
+
+def asset_url(filename):
+    return url_for("static", filename=filename, v=asset_digest(filename))
+
+
+def _cache_static(response):
+    if request.endpoint == "static" and response.status_code in (200, 304):
+        filename = request.view_args.get("filename", "")
+        fingerprint = request.args.get("v")
+        if fingerprint and os.path.isfile(os.path.join(current_app.static_folder, filename)) \
+                and fingerprint == asset_digest(filename):
+            response.cache_control.no_cache = None  # Flask's default for static files
+            response.cache_control.public = True
+            response.cache_control.max_age = current_app.config["STATIC_MAX_AGE"]
+            response.cache_control.immutable = True
+    return response
+
+
+def init_assets(app):
+    app.jinja_env.globals["asset_url"] = asset_url
+    app.after_request(_cache_static)
@@ -0,0 +1,171 @@
+import json
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+from flask import request_finished
+from flask_login import current_user
+from sqlalchemy import event, func
+from models import db, User, Quiz, Subject, Question, Score
+from synthetic_data import SYNTHETIC_PASSWORD
+
+# ⪼ Quiz flow benchmark
+# Drives the hot pages through the Flask test client as a synthetic student and as the admin,
+# recording latency percentiles and SQL statements per request for each route. Results are
+# written as JSON so two runs (e.g. before/after a change) can be compared with compare_results().
+
+DEFAULT_ITERATIONS = 50
+DEFAULT_WARMUP = 5
+
+
+def _percentile(sorted_values, fraction):
+    # Nearest-rank percentile on an already sorted list
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _summary(latencies, statements):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p90_ms": round(_percentile(latencies, 0.90) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "sql_per_request": round(statistics.fmean(statements), 2),
+        "sql_max": max(statements),
+    }
+
+
+class _StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+class _IdentityRecorder:
+    # Who the last request actually ran as (request_finished signal)
+    def __init__(self):
+        self.user_id = None
+
+    def __call__(self, sender, **extra):
+        self.user_id = current_user.get_id()
+
+
+def _login(client, username, password):
+    response = client.post("/login", data={"username": username, "password": password})
+    if response.status_code != 302 or "/login" in response.headers.get("Location", ""):
+        raise ValueError(f"Could not log in as {username!r}")
+
+
+def _pick_student(tag):
+    # A synthetic user whose branch actually has quizzes, plus one of those quizzes
+    row = db.session.query(User.id, User.username, Quiz.id) \
+        .join(Subject, Subject.branch_id == User.branch_id).join(Quiz, Quiz.subject_id == Subject.id) \
+        .filter(User.username.like(f"{tag}%")).order_by(User.id, Quiz.id).first()
+    if row is None:
+        raise ValueError(f"No synthetic users with quizzes for tag {tag!r}; run `flask seed-synthetic` first")
+    return row
+
+
+def run_benchmark(app, tag="syn42-", iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP,
+                  admin_username="admin", admin_password="admin123", include_writes=False):
+    with app.app_context():
+        student_id, username, quiz_id = _pick_student(tag)
+        admin_id = db.session.query(User.id).filter(User.username == admin_username).scalar()
+        db.session.remove()
+
+    # (name, client, user id it must run as, method, path, form data)
+    student, admin = app.test_client(), app.test_client()
+    routes = [
+        ("homepage", student, student_id, "get", "/homepage", None),
+        ("quiz", student, student_id, "get", f"/quiz/{quiz_id}", None),
+        ("profile", student, student_id, "get", "/profile", None),
+        ("admin_dashboard", admin, admin_id, "get", "/admin/dashboard", None),
+        ("manage_question", admin, admin_id, "get", "/admin/manage_question", None),
+    ]
+    if include_writes:
+        routes.append(("quiz_submit", student, student_id, "post", f"/quiz/{quiz_id}", {}))
+
+    counter = _StatementCounter()
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", counter)
+    identity = _IdentityRecorder()
+    request_finished.connect(identity, app)
+
+    results = {}
+    try:
+        with app.app_context():
+            _login(student, username, SYNTHETIC_PASSWORD)
+        with app.app_context():
+            _login(admin, admin_username, admin_password)
+
+        for name, client, user_id, method, path, data in routes:
+            latencies, statements = [], []
+            for iteration in range(warmup + iterations):
+                counter.count = 0
+                # A fresh app context per request: test requests reuse an already pushed one, and
+                # Flask-Login's cached user in its g would otherwise leak from one client to the next
+                with app.app_context():
+                    started = time.perf_counter()
+                    response = getattr(client, method)(path, data=data)
+                    elapsed = time.perf_counter() - started
+                if response.status_code >= 400 or (method == "get" and response.status_code != 200):
+                    raise ValueError(f"{name}: {method.upper()} {path} returned {response.status_code}")
+                if identity.user_id != str(user_id):
+                    raise ValueError(f"{name}: {method.upper()} {path} ran as user {identity.user_id}, not {user_id}")
+                if iteration >= warmup:
+                    latencies.append(elapsed)
+                    statements.append(counter.count)
+            results[name] = dict(_summary(latencies, statements), path=path)
+    finally:
+        request_finished.disconnect(identity, app)
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", counter)
+
+    with app.app_context():
+        dataset = {model.__tablename__: db.session.query(func.count(model.id)).scalar()
+                   for model in (User, Quiz, Question, Score)}
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "database": app.config["SQLALCHEMY_DATABASE_URI"].split("://")[0],
+            "db_profile": app.config.get("DB_PROFILE"),
+            "iterations": iterations,
+            "warmup": warmup,
+            "tag": tag,
+            "dataset": dataset,
+        },
+        "routes": results,
+    }
+
+
+def save_results(results, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_results(baseline, candidate, metrics=("p50_ms", "p90_ms", "p99_ms", "sql_per_request")):
+    # Per-route {metric: (baseline, candidate, change %)}; routes missing from either run are skipped
+    comparison = {}
+    for name, before in baseline["routes"].items():
+        after = candidate["routes"].get(name)
+        if after is None:
+            continue
+        comparison[name] = {
+            metric: (before[metric], after[metric],
+                     round((after[metric] - before[metric]) / before[metric] * 100, 1) if before[metric] else None)
+            for metric in metrics
+        }
+    return comparison
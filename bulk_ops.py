@@ -0,0 +1,176 @@
+import time
+from sqlalchemy import delete, select, update
+from models import (db, User, Branch, Subject, Chapter, Quiz, Question, Score, Response, QuizAttempt, AttemptAnswer,
+                    LeaderboardEntry, ItemStats, QuizReliability, QuizSurge)
+from answer_keys import invalidate_answer_key
+from user_stats import rebuild_users
+from leaderboards import QUIZ, BRANCH, rebuild_branch_boards
+from quiz_versions import bump_quiz_versions
+from surge import forget_surges
+
+# ⪼ Bulk admin operations
+# Cascading deletes, moves and edits over many selected rows. Each call is a handful of set-based
+# statements (DELETE ... WHERE ... IN (subquery), UPDATE ... WHERE ... IN (...)) in one transaction,
+# instead of loading objects and deleting them one by one. The schema has no FK cascades, so the
+# delete walks the tree itself: branch -> subject -> chapter -> quiz -> question / score -> response.
+# Derived tables (user stats, leaderboards, item stats) and per-process caches are updated too.
+
+LEVELS = ("branch", "subject", "chapter", "quiz", "question")
+STATS_BATCH = 500  # Users per stats rebuild statement, well under SQLite's bound-parameter limit
+
+
+def _execute(statement):
+    return db.session.execute(statement.execution_options(synchronize_session=False)).rowcount
+
+
+def _quizzes_under(level, ids):
+    # Subquery of the quiz ids below the selected items
+    if level == "quiz":
+        return select(Quiz.id).where(Quiz.id.in_(ids))
+    if level == "chapter":
+        return select(Quiz.id).where(Quiz.chapter_id.in_(ids))
+    if level == "subject":
+        return select(Quiz.id).where(Quiz.subject_id.in_(ids))
+    return select(Quiz.id).where(Quiz.subject_id.in_(select(Subject.id).where(Subject.branch_id.in_(ids))))
+
+
+def _players_and_branches(quizzes):
+    # Users with scores on the quizzes, and the branches the quizzes belong to (read before rows change)
+    user_ids = db.session.execute(select(Score.user_id).where(Score.quiz_id.in_(quizzes)).distinct()).scalars().all()
+    branch_ids = db.session.execute(
+        select(Subject.branch_id).join(Quiz, Quiz.subject_id == Subject.id).where(Quiz.id.in_(quizzes)).distinct()
+    ).scalars().all()
+    return user_ids, set(branch_ids)
+
+
+def _refresh_derived(user_ids, branch_ids):
+    # Per-user and per-subject stats are re-aggregated from Score; branch boards re-summed from quiz boards
+    for start in range(0, len(user_ids), STATS_BATCH):
+        rebuild_users(user_ids[start:start + STATS_BATCH])
+    if branch_ids:
+        rebuild_branch_boards(branch_ids)
+    db.session.info["dashboard_dirty"] = True  # Core statements bypass the dashboard's flush hook
+
+
+def delete_items(level, ids):
+    if level not in LEVELS:
+        raise ValueError(f"Can't delete {level!r}")
+    if level == "question":
+        return delete_questions(ids)
+    started = time.perf_counter()
+    if level == "branch" and db.session.query(User.id).filter(User.branch_id.in_(ids)).first() is not None:
+        raise ValueError("Branches that still have users can't be deleted; move or delete their users first.")
+
+    quizzes = _quizzes_under(level, ids)
+    quiz_ids = db.session.execute(quizzes).scalars().all()
+    user_ids, branch_ids = _players_and_branches(quizzes)
+    scores = select(Score.id).where(Score.quiz_id.in_(quizzes))
+    attempts = select(QuizAttempt.id).where(QuizAttempt.quiz_id.in_(quizzes))
+
+    # Leaves first, the quizzes themselves last: every subquery above still resolves until then
+    counts = {
+        "responses": _execute(delete(Response).where(Response.score_id.in_(scores))),
+        "attempt_answers": _execute(delete(AttemptAnswer).where(AttemptAnswer.attempt_id.in_(attempts))),
+        "attempts": _execute(delete(QuizAttempt).where(QuizAttempt.quiz_id.in_(quizzes))),
+    }
+    _execute(delete(ItemStats).where(ItemStats.quiz_id.in_(quizzes)))
+    _execute(delete(QuizReliability).where(QuizReliability.quiz_id.in_(quizzes)))
+    _execute(delete(QuizSurge).where(QuizSurge.quiz_id.in_(quizzes)))
+    _execute(delete(LeaderboardEntry).where(LeaderboardEntry.board == QUIZ, LeaderboardEntry.board_id.in_(quizzes)))
+    counts["scores"] = _execute(delete(Score).where(Score.quiz_id.in_(quizzes)))
+    counts["questions"] = _execute(delete(Question).where(Question.quiz_id.in_(quizzes)))
+    counts["quizzes"] = _execute(delete(Quiz).where(Quiz.id.in_(quizzes)))
+
+    if level == "chapter":
+        counts["chapters"] = _execute(delete(Chapter).where(Chapter.id.in_(ids)))
+    elif level == "subject":
+        counts["chapters"] = _execute(delete(Chapter).where(Chapter.subject_id.in_(ids)))
+        counts["subjects"] = _execute(delete(Subject).where(Subject.id.in_(ids)))
+    elif level == "branch":
+        subjects = select(Subject.id).where(Subject.branch_id.in_(ids))
+        counts["chapters"] = _execute(delete(Chapter).where(Chapter.subject_id.in_(subjects)))
+        counts["subjects"] = _execute(delete(Subject).where(Subject.branch_id.in_(ids)))
+        _execute(delete(LeaderboardEntry).where(LeaderboardEntry.board == BRANCH, LeaderboardEntry.board_id.in_(ids)))
+        counts["branches"] = _execute(delete(Branch).where(Branch.id.in_(ids)))
+        branch_ids -= set(ids)
+
+    _refresh_derived(user_ids, branch_ids)
+    db.session.info.setdefault("leaderboards_stale", []).extend((QUIZ, quiz_id) for quiz_id in quiz_ids)
+    db.session.commit()
+    invalidate_answer_key(*quiz_ids)
+    forget_surges(quiz_ids)
+    return dict(counts, seconds=round(time.perf_counter() - started, 3))
+
+
+def delete_questions(question_ids):
+    # Stored scores keep the deleted questions' marks until the quiz is regraded
+    started = time.perf_counter()
+    quiz_ids = db.session.execute(select(Question.quiz_id).where(Question.id.in_(question_ids)).distinct()).scalars().all()
+    counts = {
+        "responses": _execute(delete(Response).where(Response.question_id.in_(question_ids))),
+        "attempt_answers": _execute(delete(AttemptAnswer).where(AttemptAnswer.question_id.in_(question_ids))),
+    }
+    _execute(delete(ItemStats).where(ItemStats.question_id.in_(question_ids)))
+    counts["questions"] = _execute(delete(Question).where(Question.id.in_(question_ids)))
+    bump_quiz_versions(db.session, quiz_ids)
+    db.session.commit()
+    invalidate_answer_key(*quiz_ids)
+    return dict(counts, seconds=round(time.perf_counter() - started, 3))
+
+
+# ⪼ Moves
+def move_chapters(chapter_ids, subject_id):
+    started = time.perf_counter()
+    subject = db.session.get(Subject, subject_id)
+    if subject is None:
+        raise ValueError(f"Subject {subject_id} does not exist")
+
+    quizzes = select(Quiz.id).where(Quiz.chapter_id.in_(chapter_ids), Quiz.subject_id != subject_id)
+    user_ids, branch_ids = _players_and_branches(quizzes)
+    counts = {
+        "chapters": _execute(update(Chapter).where(Chapter.id.in_(chapter_ids)).values(subject_id=subject_id)),
+        "quizzes": _execute(update(Quiz).where(Quiz.chapter_id.in_(chapter_ids))
+                            .values(subject_id=subject_id, version=Quiz.version + 1)),
+    }
+    _refresh_derived(user_ids, (branch_ids | {subject.branch_id}) if branch_ids else set())
+    db.session.commit()
+    return dict(counts, seconds=round(time.perf_counter() - started, 3))
+
+
+def move_quizzes(quiz_ids, chapter_id):
+    started = time.perf_counter()
+    chapter = db.session.get(Chapter, chapter_id)
+    if chapter is None:
+        raise ValueError(f"Chapter {chapter_id} does not exist")
+
+    # Only quizzes changing subject move scores between subject stats (and maybe branch boards)
+    quizzes = select(Quiz.id).where(Quiz.id.in_(quiz_ids), Quiz.subject_id != chapter.subject_id)
+    user_ids, branch_ids = _players_and_branches(quizzes)
+    counts = {
+        "quizzes": _execute(update(Quiz).where(Quiz.id.in_(quiz_ids))
+                            .values(chapter_id=chapter_id, subject_id=chapter.subject_id, version=Quiz.version + 1)),
+    }
+    new_branch = db.session.query(Subject.branch_id).filter(Subject.id == chapter.subject_id).scalar()
+    _refresh_derived(user_ids, (branch_ids | {new_branch}) if branch_ids else set())
+    db.session.commit()
+    return dict(counts, seconds=round(time.perf_counter() - started, 3))
+
+
+# ⪼ Bulk edits
+def set_question_marks(question_ids, marks):
+    # Stored scores keep the old marks until the quiz is regraded
+    started = time.perf_counter()
+    quiz_ids = db.session.execute(select(Question.quiz_id).where(Question.id.in_(question_ids)).distinct()).scalars().all()
+    counts = {"questions": _execute(update(Question).where(Question.id.in_(question_ids)).values(marks=marks))}
+    bump_quiz_versions(db.session, quiz_ids)
+    db.session.commit()
+    invalidate_answer_key(*quiz_ids)
+    return dict(counts, seconds=round(time.perf_counter() - started, 3))
+
+
+def set_quiz_time(quiz_ids, time_limit):
+    started = time.perf_counter()
+    counts = {"quizzes": _execute(update(Quiz).where(Quiz.id.in_(quiz_ids))
+                                  .values(time=time_limit, version=Quiz.version + 1))}
+    db.session.commit()
+    return dict(counts, seconds=round(time.perf_counter() - started, 3))
@@ -0,0 +1,197 @@
+import click
+from models import db, Quiz
+from regrade import regrade_quiz
+from item_analysis import analyze_quizzes
+from user_stats import rebuild_user_stats
+from search_index import rebuild_search_index
+from leaderboards import rebuild_leaderboards
+from db_profile import benchmark_profile
+from question_import import import_questions, detect_format
+from user_import import import_users
+from query_plans import hot_queries, explain, full_scans, create_missing_indexes
+from synthetic_data import generate_dataset
+from benchmark import run_benchmark, save_results, load_results, compare_results
+
+
+def register_commands(app):
+
+    # ⪼ flask regrade <quiz_id>... | flask regrade --all
+    @app.cli.command("regrade")
+    @click.argument("quiz_ids", nargs=-1, type=int)
+    @click.option("--all", "all_quizzes", is_flag=True, help="Regrade every quiz.")
+    def regrade(quiz_ids, all_quizzes):
+        """Recompute stored quiz scores from the saved per-question responses."""
+        if all_quizzes:
+            quiz_ids = [row.id for row in db.session.query(Quiz.id).order_by(Quiz.id)]
+        if not quiz_ids:
+            raise click.UsageError("Pass one or more quiz ids, or --all.")
+
+        for quiz_id in quiz_ids:
+            try:
+                result = regrade_quiz(quiz_id)
+            except ValueError as e:
+                click.echo(str(e), err=True)
+                continue
+            click.echo(
+                f"Quiz {quiz_id}: {result['regradable']}/{result['attempts']} attempts regraded, "
+                f"{result['changed']} changed, {result['responses']} responses in {result['seconds']}s"
+            )
+
+    # ⪼ flask item-analysis <quiz_id>... | --subject <id> | --all
+    @app.cli.command("item-analysis")
+    @click.argument("quiz_ids", nargs=-1, type=int)
+    @click.option("--subject", "subject_id", type=int, help="Analyze every quiz of a subject.")
+    @click.option("--all", "all_quizzes", is_flag=True, help="Analyze every quiz.")
+    def item_analysis(quiz_ids, subject_id, all_quizzes):
+        """Recompute question difficulty, discrimination, option picks and Cronbach's alpha."""
+        query = db.session.query(Quiz.id).order_by(Quiz.id)
+        if all_quizzes:
+            quiz_ids = [row.id for row in query]
+        elif subject_id is not None:
+            quiz_ids = [row.id for row in query.filter(Quiz.subject_id == subject_id)]
+        if not quiz_ids:
+            raise click.UsageError("Pass one or more quiz ids, --subject or --all.")
+
+        result = analyze_quizzes(list(quiz_ids))
+        click.echo(f"Analyzed {result['questions']} questions in {result['quizzes']} quizzes "
+                   f"over {result['responses']} responses in {result['seconds']}s")
+
+    # ⪼ flask rebuild-stats
+    @app.cli.command("rebuild-stats")
+    @click.option("--batch-size", default=500, show_default=True, help="Users per transaction.")
+    def rebuild_stats(batch_size):
+        """Recompute the per-user profile stats tables from the Score table."""
+        rebuilt = rebuild_user_stats(batch_size=batch_size)
+        click.echo(f"Rebuilt stats for {rebuilt} users.")
+
+    # ⪼ flask rebuild-search
+    @app.cli.command("rebuild-search")
+    def rebuild_search():
+        """Rebuild the full-text search index from the base tables."""
+        rebuild_search_index()
+        click.echo("Search index rebuilt.")
+
+    # ⪼ flask rebuild-leaderboards
+    @app.cli.command("rebuild-leaderboards")
+    def rebuild_leaderboards_command():
+        """Recompute every quiz and branch leaderboard from the Score table."""
+        rebuild_leaderboards()
+        db.session.commit()
+        click.echo("Leaderboards rebuilt.")
+
+    # ⪼ flask ensure-indexes
+    @app.cli.command("ensure-indexes")
+    def ensure_indexes():
+        """Create missing indexes, then check the hot queries for full table scans."""
+        for name in create_missing_indexes():
+            click.echo(f"Created index {name}")
+
+        failed = False
+        for name, statement, allowed_tables in hot_queries():
+            plan = explain(statement)
+            scans = full_scans(plan, allowed_tables)
+            click.echo(f"{'FAIL' if scans else 'ok  '} {name}: {' | '.join(plan)}")
+            failed = failed or bool(scans)
+
+        if failed:
+            raise click.ClickException("Some hot queries still do a full table scan.")
+
+    # ⪼ flask db-bench
+    @app.cli.command("db-bench")
+    @click.option("--workers", default=8, show_default=True, help="Concurrent writer processes.")
+    @click.option("--writes", default=200, show_default=True, help="Committed inserts per worker.")
+    def db_bench(workers, writes):
+        """Compare concurrent commit throughput of the 'default' and 'production' SQLite profiles."""
+        for profile in ("default", "production"):
+            result = benchmark_profile(dict(app.config, DB_PROFILE=profile), workers=workers, writes=writes)
+            click.echo(
+                f"{profile:<10} {result['committed']} commits in {result['seconds']}s "
+                f"({result['commits_per_second']}/s), {result['locked_errors']} 'database is locked' errors"
+            )
+
+    # ⪼ flask import-questions <file>
+    @app.cli.command("import-questions")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), help="Defaults to the file extension.")
+    @click.option("--chunk-size", default=5000, show_default=True, help="Rows per transaction.")
+    def import_questions_command(path, fmt, chunk_size):
+        """Bulk import questions from a CSV or JSONL file."""
+        with open(path, newline="", encoding="utf-8") as stream:
+            report = import_questions(stream, fmt or detect_format(path), chunk_size=chunk_size)
+        for error in report["errors"]:
+            click.echo(error, err=True)
+        click.echo(f"Imported {report['imported']} questions, rejected {report['rejected']} in {report['seconds']}s.")
+
+    # ⪼ flask import-users <file.csv>
+    @app.cli.command("import-users")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--batch-size", default=500, show_default=True, help="Users per transaction.")
+    @click.option("--workers", type=int, help="Hashing processes (defaults to all cores).")
+    def import_users_command(path, batch_size, workers):
+        """Bulk create users from a CSV file, hashing passwords on all cores."""
+        def progress(imported, rate):
+            click.echo(f"  {imported} users imported ({rate} users/s)")
+
+        with open(path, newline="", encoding="utf-8") as stream:
+            report = import_users(stream, batch_size=batch_size, workers=workers, progress=progress)
+        for error in report["errors"]:
+            click.echo(error, err=True)
+        click.echo(f"Imported {report['imported']} users, rejected {report['rejected']}, "
+                   f"{report['conflicts']} conflicts in {report['seconds']}s ({report['users_per_second']} users/s).")
+
+    # ⪼ flask seed-synthetic
+    @app.cli.command("seed-synthetic")
+    @click.option("--seed", default=42, show_default=True, help="Random seed; also tags the generated rows.")
+    @click.option("--branches", default=4, show_default=True)
+    @click.option("--subjects", default=5, show_default=True, help="Subjects per branch.")
+    @click.option("--chapters", default=4, show_default=True, help="Chapters per subject.")
+    @click.option("--quizzes", default=3, show_default=True, help="Quizzes per chapter.")
+    @click.option("--questions", default=20, show_default=True, help="Questions per quiz.")
+    @click.option("--users", default=1000, show_default=True)
+    @click.option("--scores", default=10000, show_default=True, help="Quiz attempts (1k to 1M).")
+    @click.option("--responses", is_flag=True, help="Also store per-question responses for every attempt.")
+    def seed_synthetic(seed, branches, subjects, chapters, quizzes, questions, users, scores, responses):
+        """Generate a reproducible synthetic dataset for benchmarking."""
+        counts = generate_dataset(seed=seed, branches=branches, subjects_per_branch=subjects,
+                                  chapters_per_subject=chapters, quizzes_per_chapter=quizzes,
+                                  questions_per_quiz=questions, users=users, scores=scores, responses=responses)
+        click.echo(", ".join(f"{value} {name}" for name, value in counts.items() if name != "tag")
+                   + f" (tag {counts['tag']})")
+
+    # ⪼ flask bench --out results.json
+    @app.cli.command("bench", with_appcontext=False)  # Each benchmark request gets its own app context
+    @click.option("--out", type=click.Path(dir_okay=False), help="Write the results as JSON.")
+    @click.option("--tag", default="syn42-", show_default=True, help="Synthetic dataset tag to log in from.")
+    @click.option("--iterations", default=50, show_default=True, help="Measured requests per route.")
+    @click.option("--warmup", default=5, show_default=True, help="Unmeasured requests per route.")
+    @click.option("--admin-username", default="admin", show_default=True)
+    @click.option("--admin-password", default="admin123", show_default=True)
+    @click.option("--include-writes", is_flag=True, help="Also benchmark quiz submission (adds scores).")
+    def bench(out, tag, iterations, warmup, admin_username, admin_password, include_writes):
+        """Measure latency percentiles and SQL statements per request for the quiz flow."""
+        try:
+            results = run_benchmark(app, tag=tag, iterations=iterations, warmup=warmup,
+                                    admin_username=admin_username, admin_password=admin_password,
+                                    include_writes=include_writes)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+        click.echo(f"{'route':<18}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'sql/req':>10}")
+        for name, row in results["routes"].items():
+            click.echo(f"{name:<18}{row['p50_ms']:>10}{row['p90_ms']:>10}{row['p99_ms']:>10}{row['sql_per_request']:>10}")
+        if out:
+            save_results(results, out)
+            click.echo(f"Results written to {out}")
+
+    # ⪼ flask bench-compare before.json after.json
+    @app.cli.command("bench-compare")
+    @click.argument("baseline", type=click.Path(exists=True, dir_okay=False))
+    @click.argument("candidate", type=click.Path(exists=True, dir_okay=False))
+    def bench_compare(baseline, candidate):
+        """Show per-route changes between two saved benchmark runs."""
+        for name, metrics in compare_results(load_results(baseline), load_results(candidate)).items():
+            changes = "  ".join(
+                f"{metric} {before} -> {after}" + (f" ({change:+}%)" if change is not None else "")
+                for metric, (before, after, change) in metrics.items()
+            )
+            click.echo(f"{name:<18}{changes}")
@@ -0,0 +1,70 @@
+import gzip
+from flask import current_app, request
+
+try:
+    import brotli  # Optional: pip install brotli
+except ImportError:
+    brotli = None
+
+# ⪼ Response compression
+# HTML and JSON bodies above COMPRESS_MIN_SIZE are compressed with brotli (when installed and
+# accepted) or gzip. Smaller bodies go out as they are: below roughly one packet, compressing only
+# costs CPU. A compressed response gets its own strong ETag ("<etag>-br" / "<etag>-gzip"), as
+# RFC 9110 asks, and etag_matches() accepts any of those variants on revalidation.
+
+COMPRESSIBLE_TYPES = {"text/html", "application/json", "text/css", "application/javascript", "text/plain"}
+ENCODINGS = ("br", "gzip")
+
+
+def etag_matches(etags, etag):
+    # etags: request.if_none_match; True if the client holds any encoding of this representation
+    return any(etags.contains(etag + suffix) for suffix in ("", "-br", "-gzip"))
+
+
+def _choose_encoding():
+    for encoding in ENCODINGS:
+        if encoding == "br" and brotli is None:
+            continue
+        if request.accept_encodings[encoding]:
+            return encoding
+    return None
+
+
+def _compress(response):
+    config = current_app.config
+    if response.mimetype not in COMPRESSIBLE_TYPES:
+        return response
+
+    if response.status_code == 304:
+        # Echo back the variant the client revalidated, so its cache entry stays fresh
+        etag, weak = response.get_etag()
+        for encoding in ENCODINGS:
+            if etag and request.if_none_match.contains(f"{etag}-{encoding}"):
+                response.set_etag(f"{etag}-{encoding}", weak)
+        return response
+
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed \
+            or "Content-Encoding" in response.headers or request.method == "HEAD":
+        return response
+
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    encoding = _choose_encoding() if len(data) >= config["COMPRESS_MIN_SIZE"] else None
+    if encoding is None:
+        return response
+
+    if encoding == "br":
+        body = brotli.compress(data, quality=config["COMPRESS_BROTLI_QUALITY"])
+    else:
+        body = gzip.compress(data, compresslevel=config["COMPRESS_LEVEL"], mtime=0)
+    response.set_data(body)  # Also updates Content-Length
+    response.headers["Content-Encoding"] = encoding
+
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+
+def init_compression(app):
+    app.after_request(_compress)
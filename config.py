@@ -8,4 +8,61 @@ class Config:
 
     SQLALCHEMY_TRACK_MODIFICATIONS = os.getenv('SQLALCHEMY_TRACK_MODIFICATIONS', 'False') == 'True'
     SECRET_KEY = os.getenv('SECRET_KEY', 'mysecretkey')
-    DEBUG = True  
\ No newline at end of file
+    PAGE_SIZE = int(os.getenv('PAGE_SIZE', '50'))  # rows per page on admin listings
+    MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '200'))  # upper bound for ?per_page=
+    QUIZ_CHUNK_SIZE = int(os.getenv('QUIZ_CHUNK_SIZE', '10'))  # questions per fetch in paged quiz mode
+    IDENTITY_CACHE_TTL = int(os.getenv('IDENTITY_CACHE_TTL', '30'))  # seconds a logged-in user's identity is reused
+    DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', '60'))  # seconds the admin dashboard aggregates are reused
+    DEBUG = True
+
+    # ⪼ Unplanned ORM lazy loads (see strict_loading.py): 'raise', 'log' or 'off'.
+    # Empty means 'raise' under DEBUG/TESTING and 'log' otherwise.
+    STRICT_LOADING = os.getenv('STRICT_LOADING', '')
+
+    # ⪼ SQLite engine profile (see db_profile.py): 'default' or 'production' (WAL, busy timeout, larger caches)
+    DB_PROFILE = os.getenv('DB_PROFILE', 'default')
+    SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000'))  # milliseconds
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))  # bytes
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-65536'))  # negative means KiB, i.e. 64 MiB
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+  
+
+    # ⪼ Write-behind queue for quiz scores (see score_writer.py)
+    SCORE_WRITE_BEHIND = os.getenv('SCORE_WRITE_BEHIND', 'False') == 'True'
+    SCORE_BATCH_MS = int(os.getenv('SCORE_BATCH_MS', '50'))  # flush at least this often
+    SCORE_BATCH_ROWS = int(os.getenv('SCORE_BATCH_ROWS', '200'))  # or as soon as a batch is this big
+    SCORE_QUEUE_SIZE = int(os.getenv('SCORE_QUEUE_SIZE', '5000'))
+    SCORE_ENQUEUE_TIMEOUT = float(os.getenv('SCORE_ENQUEUE_TIMEOUT', '2'))  # seconds to wait for room before writing inline
+
+    # ⪼ Static assets and compression (see assets.py / compression.py)
+    STATIC_MAX_AGE = int(os.getenv('STATIC_MAX_AGE', str(365 * 24 * 3600)))  # seconds, for fingerprinted URLs
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))  # bytes; smaller bodies are sent as is
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', '6'))  # gzip, 1-9
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', '5'))  # brotli, 0-11
+
+    # ⪼ Exam-start surge mode (see surge.py): admission rate for quiz starts while a quiz is opening
+    SURGE_RATE = float(os.getenv('SURGE_RATE', '20'))  # quiz starts admitted per second
+    SURGE_BURST = int(os.getenv('SURGE_BURST', '40'))  # starts admitted at once before queueing begins
+    SURGE_MAX_WAIT = int(os.getenv('SURGE_MAX_WAIT', '120'))  # seconds; beyond this, students retry later without a slot
+    SURGE_WINDOW_MINUTES = int(os.getenv('SURGE_WINDOW_MINUTES', '15'))  # how long a quiz stays warmed and gated
+    SURGE_WORKERS = int(os.getenv('SURGE_WORKERS', os.getenv('WEB_CONCURRENCY', '1')))  # worker processes sharing SURGE_RATE
+    SURGE_POLL_SECONDS = float(os.getenv('SURGE_POLL_SECONDS', '2'))  # how often a worker re-reads which quizzes are surging
+
+    LEADERBOARD_TTL = int(os.getenv('LEADERBOARD_TTL', '300'))  # seconds before an in-memory rank index is reloaded in the background
+
+    # ⪼ Template caches (see fragment_cache.py)
+    FRAGMENT_CACHE_SIZE = int(os.getenv('FRAGMENT_CACHE_SIZE', '512'))  # rendered fragments kept per process (LRU)
+    JINJA_BYTECODE_CACHE_DIR = os.getenv('JINJA_BYTECODE_CACHE_DIR', '')  # empty means <instance>/jinja_cache
+
+    # ⪼ On-demand request profiler (see profiler.py); also switched on and off at /admin/profiler
+    PROFILE_ENABLED = os.getenv('PROFILE_ENABLED', 'False') == 'True'
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0.01'))  # share of all requests profiled while enabled
+    PROFILE_ENDPOINTS = os.getenv('PROFILE_ENDPOINTS', '')  # comma-separated endpoint patterns always profiled, e.g. routes.quiz,admin.manage_*
+    PROFILE_STACK_INTERVAL_MS = int(os.getenv('PROFILE_STACK_INTERVAL_MS', '5'))  # stack sampling period for flame graphs
+    PROFILE_DIR = os.getenv('PROFILE_DIR', '')  # empty means <instance>/profiles
+    PROFILE_SETTINGS_TTL = float(os.getenv('PROFILE_SETTINGS_TTL', '2'))  # seconds between a worker's checks of the shared settings file
+
+    # ⪼ Logging (see instrumentation.py): DEBUG records are sampled at LOG_SAMPLE_RATE
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '0.01'))
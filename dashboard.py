@@ -0,0 +1,69 @@
+import time
+from flask import current_app
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from models import db, User, Branch, Subject, Quiz
+
+# ⪼ Admin dashboard aggregates
+# Computed once, then served from memory until the TTL runs out or a relevant write commits.
+
+_cache = {"data": None, "computed_at": 0.0}
+
+# Writes to these models change the dashboard numbers
+_DASHBOARD_MODELS = (User, Branch, Subject, Quiz)
+
+
+def compute_dashboard():
+    branch_users = db.session.query(Branch.name, func.count(User.id)) \
+        .select_from(User) \
+        .outerjoin(Branch, Branch.id == User.branch_id) \
+        .group_by(User.branch_id, Branch.name) \
+        .order_by(User.branch_id).all()
+
+    branch_quizzes = db.session.query(Branch.name, func.count(Quiz.id)) \
+        .select_from(Quiz) \
+        .join(Subject, Quiz.subject_id == Subject.id) \
+        .join(Branch, Subject.branch_id == Branch.id) \
+        .group_by(Subject.branch_id, Branch.name) \
+        .order_by(Subject.branch_id).all()
+
+    return {
+        "users_count": db.session.query(func.count(User.id)).scalar(),
+        "quizzes_count": db.session.query(func.count(Quiz.id)).scalar(),
+        "branch_users": [{"branch": name or "No branch", "count": count} for name, count in branch_users],
+        "branch_quizzes": [{"branch": name, "count": count} for name, count in branch_quizzes],
+    }
+
+
+def get_dashboard():
+    # Returns (data, age in seconds)
+    data, computed_at = _cache["data"], _cache["computed_at"]
+    now = time.time()
+    if data is None or now - computed_at > current_app.config["DASHBOARD_CACHE_TTL"]:
+        data, computed_at = compute_dashboard(), now
+        _cache.update(data=data, computed_at=computed_at)
+    return data, now - computed_at
+
+
+def invalidate_dashboard():
+    _cache["data"] = None
+
+
+# ⪼ Drop the cache whenever a session commits a change to one of the dashboard models
+@event.listens_for(Session, "before_flush")
+def _track_dashboard_writes(session, flush_context, instances):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _DASHBOARD_MODELS):
+            session.info["dashboard_dirty"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop("dashboard_dirty", False):
+        invalidate_dashboard()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("dashboard_dirty", None)
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import time
+from multiprocessing import Pool
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+from models import db
+
+# ⪼ SQLite engine profiles
+# 'default' keeps SQLite's stock rollback journal. 'production' switches to WAL with relaxed fsyncs,
+# a busy timeout and bigger caches, so several gunicorn workers can write Score rows at once.
+
+def profile_pragmas(config):
+    if config["DB_PROFILE"] != "production":
+        return {}
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": config["SQLITE_BUSY_TIMEOUT"],
+        "mmap_size": config["SQLITE_MMAP_SIZE"],
+        "cache_size": config["SQLITE_CACHE_SIZE"],
+        "temp_store": "MEMORY",
+    }
+
+
+def profile_engine_options(config):
+    options = {}
+    uri = config["SQLALCHEMY_DATABASE_URI"]
+    if config["DB_PROFILE"] == "production" and uri.startswith("sqlite") and ":memory:" not in uri:
+        options.update(
+            pool_size=config["DB_POOL_SIZE"],
+            max_overflow=config["DB_MAX_OVERFLOW"],
+            pool_timeout=30,
+            # pysqlite's own lock wait, in seconds; kept in step with PRAGMA busy_timeout
+            connect_args={"timeout": config["SQLITE_BUSY_TIMEOUT"] / 1000},
+        )
+    return options
+
+
+def _pragma_hook(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        if type(dbapi_connection).__module__.startswith("sqlite3"):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+            cursor.close()
+    return set_pragmas
+
+
+def init_engine(app):
+    # db.init_app with the configured profile: pool options go in before the engine is built,
+    # the pragma hook is attached to the app's own engines afterwards
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = dict(
+        profile_engine_options(app.config), **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+    )
+    db.init_app(app)
+
+    pragmas = profile_pragmas(app.config)
+    if pragmas:
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "connect", _pragma_hook(pragmas))
+
+
+# ⪼ Concurrency benchmark: N processes each committing one Score-sized row per transaction
+def _bench_worker(args):
+    path, pragmas, timeout, writes = args
+    engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": timeout})
+    event.listen(engine, "connect", _pragma_hook(pragmas))
+    committed = locked = 0
+    with engine.connect() as conn:
+        for i in range(writes):
+            try:
+                with conn.begin():
+                    conn.execute(text("INSERT INTO score (quiz_id, user_id, score) VALUES (1, :u, :s)"),
+                                 {"u": os.getpid(), "s": i})
+                committed += 1
+            except OperationalError:
+                locked += 1
+    engine.dispose()
+    return committed, locked
+
+
+def benchmark_profile(config, workers=8, writes=200):
+    pragmas = profile_pragmas(config)
+    timeout = config["SQLITE_BUSY_TIMEOUT"] / 1000 if pragmas else 5.0  # 5.0 is pysqlite's own default
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine = create_engine(f"sqlite:///{path}")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE score (id INTEGER PRIMARY KEY, quiz_id INTEGER, user_id INTEGER, score INTEGER)"))
+        engine.dispose()
+
+        started = time.perf_counter()
+        with Pool(workers) as pool:
+            results = pool.map(_bench_worker, [(path, pragmas, timeout, writes)] * workers)
+        elapsed = time.perf_counter() - started
+
+    committed = sum(r[0] for r in results)
+    return {
+        "profile": config["DB_PROFILE"],
+        "workers": workers,
+        "committed": committed,
+        "locked_errors": sum(r[1] for r in results),
+        "seconds": round(elapsed, 3),
+        "commits_per_second": round(committed / elapsed, 1),
+    }
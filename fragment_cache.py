@@ -0,0 +1,82 @@
+import os
+from collections import OrderedDict
+from threading import Lock
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+# ⪼ Template fragment cache
+#   {% cache "questions", quiz.id, quiz.version %} ... {% endcache %}
+# renders the block once per key and serves the stored HTML afterwards. Keys should carry an entity
+# version (Quiz.version), so an edit produces a new key instead of needing an invalidation; the old
+# entries simply age out of the LRU. The key is prefixed with the template name.
+
+class FragmentLRU:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, cached_fragments=len(self._entries))
+
+
+fragments = FragmentLRU(512)
+
+
+class FragmentCacheExtension(Extension):
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        key = nodes.List([nodes.Const(parser.name)] + parts)
+        return nodes.CallBlock(self.call_method("_render_cached", [key]), [], [], body).set_lineno(lineno)
+
+    def _render_cached(self, key, caller):
+        key = tuple(key)
+        html = fragments.get(key)
+        if html is None:
+            html = caller()
+            fragments.set(key, html)
+        return html
+
+
+def fragment_cache_stats():
+    return fragments.stats()
+
+
+def init_fragment_cache(app):
+    fragments.max_entries = app.config["FRAGMENT_CACHE_SIZE"]
+    app.jinja_env.add_extension(FragmentCacheExtension)
+
+    # Compiled templates are kept on disk, so new workers skip parsing and compiling them
+    directory = app.config["JINJA_BYTECODE_CACHE_DIR"] or os.path.join(app.instance_path, "jinja_cache")
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
@@ -0,0 +1,72 @@
+import time
+from threading import Lock
+from flask import current_app
+from flask_login import UserMixin
+from models import db, User
+
+# ⪼ Identity cache for the Flask-Login user_loader
+# Most pages only need who the user is: id, username, branch and admin flag. Those are kept as an
+# immutable snapshot per process for IDENTITY_CACHE_TTL seconds, so hot pages skip the user query.
+# Anything else (name, email, relationships) falls through to the full User row, loaded on demand.
+
+class Identity(UserMixin):
+    _fields = ("id", "username", "branch_id", "is_admin")
+
+    def __init__(self, id, username, branch_id, is_admin):
+        for field, value in zip(self._fields, (id, username, branch_id, is_admin)):
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Identity snapshots are read-only")
+
+    def __getattr__(self, name):
+        # Only reached for attributes outside the snapshot
+        if name.startswith("_"):
+            raise AttributeError(name)
+        user = db.session.get(User, self.id)  # The session's identity map makes repeat lookups free
+        return getattr(user, name)
+
+    def __eq__(self, other):
+        return isinstance(other, (Identity, User)) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+_identities = {}
+_lock = Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def load_identity(user_id):
+    now = time.monotonic()
+    cached = _identities.get(user_id)
+    if cached is not None and cached[1] > now:
+        with _lock:
+            _stats["hits"] += 1
+        return cached[0]
+
+    row = db.session.query(User.id, User.username, User.branch_id, User.is_admin) \
+        .filter(User.id == user_id).first()
+    with _lock:
+        _stats["misses"] += 1
+    if row is None:
+        _identities.pop(user_id, None)
+        return None
+
+    identity = Identity(row.id, row.username, row.branch_id, bool(row.is_admin))
+    _identities[user_id] = (identity, now + current_app.config["IDENTITY_CACHE_TTL"])
+    return identity
+
+
+def invalidate_identity(*user_ids):
+    # Called wherever an admin edits or deletes a user
+    with _lock:
+        for user_id in user_ids:
+            if user_id is not None:
+                _identities.pop(int(user_id), None)
+
+
+def identity_cache_stats():
+    with _lock:
+        return dict(_stats, cached_users=len(_identities))
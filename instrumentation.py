@@ -0,0 +1,180 @@
+import logging
+import random
+import time
+from bisect import bisect_left
+from threading import Lock
+from flask import g, has_request_context, request, before_render_template, template_rendered
+from sqlalchemy import event
+from models import db
+
+# ⪼ Instrumentation
+# Per-endpoint request latency, SQL statement counts/time and template render time, kept in
+# process memory and exposed in Prometheus text format at /admin/metrics.
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # Last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+_lock = Lock()
+_request_latency = {}   # endpoint -> Histogram
+_sql_per_request = {}   # endpoint -> Histogram of statements per request
+_sql_totals = {}        # endpoint -> [statements, seconds]
+_template_render = {}   # template name -> Histogram
+
+
+def _observe(table, key, value):
+    with _lock:
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram()
+        histogram.observe(value)
+
+
+def _endpoint():
+    return (request.endpoint or "unmatched") if has_request_context() else "background"
+
+
+# ⪼ Request hooks
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    g.sql_statements = 0
+
+
+def _finish_request(response):
+    started = g.pop("metrics_started", None)
+    if started is not None:
+        endpoint = _endpoint()
+        _observe(_request_latency, endpoint, time.perf_counter() - started)
+        _observe(_sql_per_request, endpoint, g.pop("sql_statements", 0))
+    return response
+
+
+# ⪼ SQLAlchemy engine events
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    endpoint = _endpoint()
+    if has_request_context() and "sql_statements" in g:
+        g.sql_statements += 1
+    with _lock:
+        totals = _sql_totals.setdefault(endpoint, [0, 0.0])
+        totals[0] += 1
+        totals[1] += elapsed
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time so the next
+    # statement on this pooled connection isn't timed from it
+    if context.connection is not None:
+        started = context.connection.info.get("query_started")
+        if started:
+            started.pop()
+
+
+# ⪼ Template render timing (Flask signals)
+def _before_render(sender, template, context, **extra):
+    g.setdefault("render_started", {})[template.name] = time.perf_counter()
+
+
+def _after_render(sender, template, context, **extra):
+    started = g.get("render_started", {}).pop(template.name, None)
+    if started is not None:
+        _observe(_template_render, template.name, time.perf_counter() - started)
+
+
+def init_metrics(app):
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+            event.listen(engine, "handle_error", _handle_error)
+
+
+# ⪼ Prometheus text exposition
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram_lines(name, help_text, label, table):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for key, histogram in sorted(table.items()):
+        cumulative = 0
+        for bound, count in zip((*BUCKETS, "+Inf"), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{label}="{_label(key)}",le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{label}="{_label(key)}"}} {histogram.total:.6f}')
+        lines.append(f'{name}_count{{{label}="{_label(key)}"}} {histogram.count}')
+    return lines
+
+
+def _gauge_lines(name, help_text, values, kind="gauge"):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name} {value}" for value in values)
+    return lines
+
+
+def render_prometheus(extra_stats=None):
+    # extra_stats: {"cache_name": {"stat": number, ...}} from the app's caches/queues
+    with _lock:
+        lines = _histogram_lines("quizles_request_duration_seconds", "Request latency per endpoint.",
+                                 "endpoint", _request_latency)
+        lines += _histogram_lines("quizles_request_sql_statements", "SQL statements issued per request.",
+                                  "endpoint", _sql_per_request)
+        lines += _histogram_lines("quizles_template_render_seconds", "Template render time.",
+                                  "template", _template_render)
+        lines += ["# HELP quizles_sql_statements_total SQL statements executed.",
+                  "# TYPE quizles_sql_statements_total counter"]
+        lines += [f'quizles_sql_statements_total{{endpoint="{_label(k)}"}} {v[0]}' for k, v in sorted(_sql_totals.items())]
+        lines += ["# HELP quizles_sql_seconds_total Time spent executing SQL.",
+                  "# TYPE quizles_sql_seconds_total counter"]
+        lines += [f'quizles_sql_seconds_total{{endpoint="{_label(k)}"}} {v[1]:.6f}' for k, v in sorted(_sql_totals.items())]
+
+    for source, stats in (extra_stats or {}).items():
+        for stat, value in sorted((stats or {}).items()):
+            if isinstance(value, (int, float)):
+                lines += _gauge_lines(f"quizles_{source}_{stat}", f"{source} {stat.replace('_', ' ')}.", [value])
+    return "\n".join(lines) + "\n"
+
+
+# ⪼ Levelled, sampled logging
+class SamplingFilter(logging.Filter):
+    # DEBUG records are kept with probability `rate`; INFO and above always pass
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+_logging_ready = False
+
+def setup_logging(app):
+    global _logging_ready
+    if _logging_ready:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    handler.addFilter(SamplingFilter(app.config["LOG_SAMPLE_RATE"]))
+    root = logging.getLogger()
+    root.setLevel(app.config["LOG_LEVEL"])
+    root.addHandler(handler)
+    _logging_ready = True
@@ -0,0 +1,117 @@
+import time
+from datetime import datetime, timezone
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+from models import db, Question, Score, Response, ItemStats, QuizReliability
+from regrade import _fetch_array
+
+# ⪼ Item analysis
+# For each quiz, the stored responses are loaded into an (attempts x questions) matrix of selected
+# options (0 = left blank, -1 = question not in that attempt) and every statistic is computed with
+# whole-matrix NumPy operations:
+#   difficulty     - p-value, the share of attempts answering the question correctly
+#   discrimination - point-biserial correlation between getting the question right and the
+#                    attempt's score on the other questions (corrected item-total)
+#   picks          - how often each option was chosen, to spot dead or misleading distractors
+#   alpha          - Cronbach's alpha of the quiz, over the attempts that saw every question
+# Results are cached in item_stats / quiz_reliability and shown on manage_question.
+
+OPTIONS = 4
+
+
+def _analyze_quiz(quiz_id):
+    key = _fetch_array(
+        select(Question.id, Question.ans, Question.marks).where(Question.quiz_id == quiz_id).order_by(Question.id),
+        3
+    )
+    responses = _fetch_array(
+        select(Response.score_id, Response.question_id, func.coalesce(Response.selected, 0))
+        .join(Score, Score.id == Response.score_id)
+        .where(Score.quiz_id == quiz_id),
+        3
+    )
+    question_ids, answers, marks = key[:, 0], key[:, 1], key[:, 2].astype(np.float64)
+    n_items = len(question_ids)
+    if not n_items:
+        return [], None
+
+    # Keep responses to current questions only, then place them in the matrix
+    q_idx = np.minimum(np.searchsorted(question_ids, responses[:, 1]), n_items - 1)
+    current = question_ids[q_idx] == responses[:, 1]
+    q_idx, selected = q_idx[current], responses[current, 2]
+    attempt_ids, a_idx = np.unique(responses[current, 0], return_inverse=True)
+    n_attempts = len(attempt_ids)
+
+    picks = np.full((n_attempts, n_items), -1, dtype=np.int8)
+    picks[a_idx, q_idx] = selected
+    seen = picks >= 0
+    correct = (picks == answers).astype(np.float64)  # Unseen cells are never correct
+
+    counts = seen.sum(axis=0)
+    safe_counts = np.maximum(counts, 1)
+    difficulty = correct.sum(axis=0) / safe_counts
+
+    # Point-biserial against the rest of the attempt: r = cov(x, y) / sqrt(var(x) var(y)) over seen cells
+    points = correct * marks
+    rest = (points.sum(axis=1)[:, None] - points) * seen
+    mean_rest = rest.sum(axis=0) / safe_counts
+    cov = (correct * rest).sum(axis=0) / safe_counts - difficulty * mean_rest
+    var_rest = (rest ** 2).sum(axis=0) / safe_counts - mean_rest ** 2
+    denominator = np.sqrt(difficulty * (1 - difficulty) * var_rest)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        discrimination = np.where(denominator > 1e-12, cov / denominator, np.nan)
+
+    # Option frequencies per question: 0 (blank) .. OPTIONS, unseen cells dropped
+    flat = (np.arange(n_items) * (OPTIONS + 1) + np.clip(picks, 0, OPTIONS))[seen]
+    option_counts = np.bincount(flat, minlength=n_items * (OPTIONS + 1)).reshape(n_items, OPTIONS + 1)
+
+    # Cronbach's alpha needs the same questions in every row, so only complete attempts count
+    complete = points[seen.all(axis=1)]
+    alpha = None
+    if n_items > 1 and len(complete) > 1:
+        total_var = complete.sum(axis=1).var(ddof=1)
+        if total_var > 0:
+            alpha = n_items / (n_items - 1) * (1 - complete.var(axis=0, ddof=1).sum() / total_var)
+
+    rows = [{
+        "question_id": int(question_ids[j]),
+        "quiz_id": quiz_id,
+        "attempts": int(counts[j]),
+        "difficulty": float(difficulty[j]) if counts[j] else None,
+        "discrimination": None if np.isnan(discrimination[j]) else float(discrimination[j]),
+        "blank": int(option_counts[j, 0]),
+        "picked1": int(option_counts[j, 1]),
+        "picked2": int(option_counts[j, 2]),
+        "picked3": int(option_counts[j, 3]),
+        "picked4": int(option_counts[j, 4]),
+    } for j in range(n_items)]
+    summary = {"quiz_id": quiz_id, "attempts": n_attempts, "complete": int(len(complete)),
+               "alpha": None if alpha is None else float(alpha)}
+    return rows, summary
+
+
+def analyze_quizzes(quiz_ids):
+    # Recomputes and stores the item statistics of the given quizzes, one transaction for the batch
+    started = time.perf_counter()
+    computed_at = datetime.now(timezone.utc)
+    items, summaries = [], []
+    for quiz_id in quiz_ids:
+        rows, summary = _analyze_quiz(quiz_id)
+        items += rows
+        if summary is not None:
+            summaries.append(dict(summary, computed_at=computed_at))
+
+    db.session.execute(delete(ItemStats).where(ItemStats.quiz_id.in_(quiz_ids)))
+    db.session.execute(delete(QuizReliability).where(QuizReliability.quiz_id.in_(quiz_ids)))
+    if items:
+        db.session.execute(insert(ItemStats), items)
+    if summaries:
+        db.session.execute(insert(QuizReliability), summaries)
+    db.session.commit()
+
+    return {
+        "quizzes": len(summaries),
+        "questions": len(items),
+        "responses": sum(row["attempts"] for row in items),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
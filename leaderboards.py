@@ -0,0 +1,294 @@
+import threading
+import time
+from threading import Lock
+from flask import current_app, has_app_context
+from sqlalchemy import event, delete, func, insert, select, literal, true
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from models import db, User, Subject, Quiz, Score, LeaderboardEntry
+
+# ⪼ Leaderboards
+# Two kinds of board, materialized in leaderboard_entry and kept up to date on every score write:
+#   quiz   - a user's best score on the quiz
+#   branch - the sum of a user's best scores over the quizzes of the branch (Quiz -> Subject -> Branch)
+# Top-k reads walk the (board, board_id, score) index. Ranks come from an in-memory Fenwick tree per
+# board (count of users at each score), so rank lookups and updates are O(log n). Boards stay in memory
+# and are updated from this process's commits; every LEADERBOARD_TTL seconds a board is reloaded in a
+# background thread to pick up other workers' writes. A request never waits for a load: while a board
+# is missing or being reloaded, its ranks are answered with indexed COUNT(*) queries instead.
+
+QUIZ, BRANCH = "quiz", "branch"
+
+
+class RankIndex:
+    # Fenwick tree over integer scores: how many users have a score above x, in O(log max_score)
+    def __init__(self, capacity=64):
+        self.size = 1
+        while self.size < capacity:
+            self.size *= 2
+        self.tree = [0] * (self.size + 1)
+        self.total = 0
+
+    def _grow(self, score):
+        counts = [self.count_at(s) for s in range(self.size)]
+        while self.size <= score:
+            self.size *= 2
+        self.tree = [0] * (self.size + 1)
+        self.total = 0
+        for s, count in enumerate(counts):
+            if count:
+                self.add(s, count)
+
+    def add(self, score, count=1):
+        if score >= self.size:
+            self._grow(score)
+        self.total += count
+        i = score + 1
+        while i <= self.size:
+            self.tree[i] += count
+            i += i & -i
+
+    def count_upto(self, score):
+        # Users with a score <= score
+        i, result = min(score, self.size - 1) + 1, 0
+        while i > 0:
+            result += self.tree[i]
+            i -= i & -i
+        return result
+
+    def count_at(self, score):
+        return self.count_upto(score) - (self.count_upto(score - 1) if score > 0 else 0)
+
+    def count_above(self, score):
+        return self.total - self.count_upto(score)
+
+
+class Board:
+    def __init__(self, rows, loaded_at):
+        self.scores = dict(rows)  # user_id -> score
+        self.index = RankIndex(max(self.scores.values(), default=0) + 1)
+        for score in self.scores.values():
+            self.index.add(score)
+        self.loaded_at = loaded_at
+
+    def set(self, user_id, score):
+        old = self.scores.get(user_id)
+        if old is not None:
+            self.index.add(old, -1)
+        self.scores[user_id] = score
+        self.index.add(score)
+
+    def rank(self, user_id):
+        score = self.scores.get(user_id)
+        if score is None:
+            return None
+        return {"rank": self.index.count_above(score) + 1, "score": score, "players": self.index.total}
+
+
+_boards = {}  # (board, board_id) -> Board
+_reloading = {}  # (board, board_id) -> [(user_id, score)] committed while its reload query runs, None to discard
+_lock = Lock()
+
+
+def _reload(app, key):
+    try:
+        with app.app_context():
+            rows = db.session.query(LeaderboardEntry.user_id, LeaderboardEntry.score) \
+                .filter(LeaderboardEntry.board == key[0], LeaderboardEntry.board_id == key[1]).all()
+            db.session.remove()
+        loaded = Board(rows, time.monotonic())
+        with _lock:
+            raced = _reloading.get(key)
+            if raced is not None:  # None: the board was rebuilt meanwhile and the rows may predate it
+                # Replay commits that raced the query; values are absolute, so seen-twice is harmless
+                for user_id, score in raced:
+                    loaded.set(user_id, score)
+                _boards[key] = loaded
+    finally:
+        with _lock:
+            _reloading.pop(key, None)
+
+
+def _board(board, board_id):
+    # The in-memory board, or None while it's (re)loading in the background
+    key = (board, board_id)
+    cached = _boards.get(key)
+    if cached is not None and time.monotonic() - cached.loaded_at < current_app.config["LEADERBOARD_TTL"]:
+        return cached
+    with _lock:
+        if key in _reloading:
+            return cached
+        _reloading[key] = []
+    threading.Thread(target=_reload, args=(current_app._get_current_object(), key),
+                     name="leaderboard-reload", daemon=True).start()
+    return cached  # A stale board still has this process's own writes; it's replaced when the reload lands
+
+
+def _rank_from_table(board, board_id, user_id):
+    entries = db.session.query(func.count()).select_from(LeaderboardEntry) \
+        .filter(LeaderboardEntry.board == board, LeaderboardEntry.board_id == board_id)
+    score = db.session.query(LeaderboardEntry.score).filter(
+        LeaderboardEntry.board == board, LeaderboardEntry.board_id == board_id, LeaderboardEntry.user_id == user_id
+    ).scalar()
+    if score is None:
+        return None
+    above = entries.filter(LeaderboardEntry.score > score).scalar()  # Range scan of the score index
+    return {"rank": above + 1, "score": score, "players": entries.scalar()}
+
+
+def rank(board, board_id, user_id):
+    # {"rank", "score", "players"} for the user, or None if they aren't on the board yet
+    loaded = _board(board, board_id) if has_app_context() else None
+    if loaded is None:
+        return _rank_from_table(board, board_id, user_id)
+    return loaded.rank(user_id)
+
+
+def top(board, board_id, k=10):
+    # Top k by score with competition ranking (ties share a rank); an index range scan of k rows
+    rows = db.session.query(LeaderboardEntry.user_id, User.name, LeaderboardEntry.score) \
+        .join(User, User.id == LeaderboardEntry.user_id) \
+        .filter(LeaderboardEntry.board == board, LeaderboardEntry.board_id == board_id) \
+        .order_by(LeaderboardEntry.score.desc(), LeaderboardEntry.user_id).limit(k).all()
+    standings, previous = [], None
+    for position, row in enumerate(rows, start=1):
+        if previous is None or row.score != previous[1]:
+            previous = (position, row.score)
+        standings.append({"rank": previous[0], "user_id": row.user_id, "name": row.name, "score": row.score})
+    return standings
+
+
+# ⪼ Incremental maintenance (called from score_writer.write_attempts, in its transaction)
+def record_best_scores(attempts):
+    # attempts: [(user_id, quiz_id, subject_id, score), ...]
+    best = {}
+    for user_id, quiz_id, subject_id, score in attempts:
+        if score > best.get((user_id, quiz_id), (-1, None))[0]:
+            best[(user_id, quiz_id)] = (score, subject_id)
+
+    quiz_ids = {quiz_id for _, quiz_id in best}
+    user_ids = {user_id for user_id, _ in best}
+    current = {(row.user_id, row.board_id): row.score for row in db.session.query(
+        LeaderboardEntry.user_id, LeaderboardEntry.board_id, LeaderboardEntry.score
+    ).filter(LeaderboardEntry.board == QUIZ, LeaderboardEntry.board_id.in_(quiz_ids),
+             LeaderboardEntry.user_id.in_(user_ids))}
+    branch_of = dict(db.session.query(Subject.id, Subject.branch_id)
+                     .filter(Subject.id.in_({subject_id for _, subject_id in best.values()})))
+
+    quiz_rows, branch_gains = [], {}
+    for (user_id, quiz_id), (score, subject_id) in best.items():
+        old = current.get((user_id, quiz_id))
+        if old is not None and score <= old:
+            continue  # Not a personal best: nothing moves
+        quiz_rows.append({"board": QUIZ, "board_id": quiz_id, "user_id": user_id, "score": score})
+        key = (branch_of[subject_id], user_id)
+        branch_gains[key] = branch_gains.get(key, 0) + score - (old or 0)
+    if not quiz_rows:
+        return
+
+    stmt = sqlite_insert(LeaderboardEntry)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=["board", "board_id", "user_id"], set_={"score": stmt.excluded.score}
+    ), quiz_rows)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=["board", "board_id", "user_id"], set_={"score": LeaderboardEntry.score + stmt.excluded.score}
+    ), [{"board": BRANCH, "board_id": branch_id, "user_id": user_id, "score": gain}
+        for (branch_id, user_id), gain in branch_gains.items()])
+
+    # Applied to the in-memory boards once the transaction commits, as new absolute scores
+    branch_totals = db.session.query(LeaderboardEntry.board_id, LeaderboardEntry.user_id, LeaderboardEntry.score) \
+        .filter(LeaderboardEntry.board == BRANCH,
+                LeaderboardEntry.board_id.in_({branch_id for branch_id, _ in branch_gains}),
+                LeaderboardEntry.user_id.in_({user_id for _, user_id in branch_gains}))
+    pending = db.session.info.setdefault("leaderboard_updates", [])
+    pending += [(QUIZ, row["board_id"], row["user_id"], row["score"]) for row in quiz_rows]
+    pending += [(BRANCH, row.board_id, row.user_id, row.score) for row in branch_totals
+                if (row.board_id, row.user_id) in branch_gains]
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session):
+    updates = session.info.pop("leaderboard_updates", None)
+    stale = session.info.pop("leaderboards_stale", None)
+    with _lock:
+        for board, board_id in stale or ():
+            _boards.pop((board, board_id), None)  # Rebuilt wholesale: the next read reloads it
+            if (board, board_id) in _reloading:
+                _reloading[(board, board_id)] = None
+        for board, board_id, user_id, score in updates or ():
+            if _reloading.get((board, board_id)) is not None:
+                _reloading[(board, board_id)].append((user_id, score))
+            loaded = _boards.get((board, board_id))
+            if loaded is not None:
+                loaded.set(user_id, score)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("leaderboard_updates", None)
+    session.info.pop("leaderboards_stale", None)
+
+
+# ⪼ Rebuild with window functions (after a regrade, or from `flask rebuild-leaderboards`)
+def rebuild_leaderboards(quiz_ids=None):
+    # Runs in the caller's transaction. quiz_ids=None rebuilds every board.
+    quiz_filter = Score.quiz_id.in_(quiz_ids) if quiz_ids is not None else true()
+    branch_ids = None
+    if quiz_ids is not None:
+        branch_ids = {row[0] for row in db.session.query(Subject.branch_id)
+                      .join(Quiz, Quiz.subject_id == Subject.id).filter(Quiz.id.in_(quiz_ids))}
+
+    # Best attempt per (quiz, user): ROW_NUMBER() over each pair's attempts, highest score first
+    ranked = select(
+        Score.quiz_id, Score.user_id, Score.score,
+        func.row_number().over(partition_by=(Score.quiz_id, Score.user_id), order_by=Score.score.desc()).label("n"),
+    ).where(quiz_filter).subquery()
+    best = select(ranked.c.quiz_id, ranked.c.user_id, ranked.c.score).where(ranked.c.n == 1).subquery()
+
+    boards = LeaderboardEntry.__table__
+    if quiz_ids is None:
+        db.session.execute(delete(boards))
+    else:
+        db.session.execute(delete(boards).where(boards.c.board == QUIZ, boards.c.board_id.in_(quiz_ids)))
+        db.session.execute(delete(boards).where(boards.c.board == BRANCH, boards.c.board_id.in_(branch_ids)))
+
+    db.session.execute(insert(boards).from_select(
+        ["board", "board_id", "user_id", "score"],
+        select(literal(QUIZ), best.c.quiz_id, best.c.user_id, best.c.score),
+    ))
+
+    # Branch boards: sum of the (now rebuilt) quiz bests over each branch's quizzes
+    _insert_branch_totals(branch_ids)
+
+    stale = db.session.info.setdefault("leaderboards_stale", [])
+    if quiz_ids is None:
+        stale += list(_boards)
+    else:
+        stale += [(QUIZ, quiz_id) for quiz_id in quiz_ids] + [(BRANCH, branch_id) for branch_id in branch_ids]
+
+
+def _insert_branch_totals(branch_ids=None):
+    boards = LeaderboardEntry.__table__
+    quiz_entries = select(boards.c.board_id, boards.c.user_id, boards.c.score).where(boards.c.board == QUIZ).subquery()
+    branch_totals = select(literal(BRANCH), Subject.branch_id, quiz_entries.c.user_id, func.sum(quiz_entries.c.score)) \
+        .join(Quiz, Quiz.id == quiz_entries.c.board_id).join(Subject, Subject.id == Quiz.subject_id) \
+        .group_by(Subject.branch_id, quiz_entries.c.user_id)
+    if branch_ids is not None:
+        branch_totals = branch_totals.where(Subject.branch_id.in_(branch_ids))
+    db.session.execute(insert(boards).from_select(["board", "board_id", "user_id", "score"], branch_totals))
+
+
+def rebuild_branch_boards(branch_ids):
+    # Re-sums the branch boards from the quiz boards, after quizzes were deleted or moved between branches
+    boards = LeaderboardEntry.__table__
+    db.session.execute(delete(boards).where(boards.c.board == BRANCH, boards.c.board_id.in_(branch_ids)))
+    _insert_branch_totals(branch_ids)
+    db.session.info.setdefault("leaderboards_stale", []).extend((BRANCH, branch_id) for branch_id in branch_ids)
+
+
+def setup_leaderboards(app):
+    # Databases with scores recorded before leaderboards existed get their boards built once
+    with app.app_context():
+        if db.session.query(LeaderboardEntry.board).first() is None and db.session.query(Score.id).first() is not None:
+            rebuild_leaderboards()
+            db.session.commit()
@@ -21,10 +21,28 @@ def create_admin():
     db.session.commit()
 
 
+# Columns added to existing tables after their first release. create_all() only creates missing
+# tables, so older databases get these with ALTER TABLE ... ADD COLUMN on startup.
+ADDED_COLUMNS = {
+    "quiz": {"version": "INTEGER NOT NULL DEFAULT 1"},
+    "quiz_attempt": {"question_ids": "TEXT"},
+}
+
+def upgrade_schema():
+    inspector = db.inspect(db.engine)
+    with db.engine.begin() as conn:
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {column["name"] for column in inspector.get_columns(table)}
+            for name, ddl in columns.items():
+                if name not in existing:
+                    conn.exec_driver_sql(f'ALTER TABLE "{table}" ADD COLUMN {name} {ddl}')
+
+
 def setup_database(app):
     #Initialize the database and create admin if missing.
     with app.app_context():
         db.create_all()  # Create tables if they don't exist
+        upgrade_schema()  # Add columns introduced since the tables were created
         create_admin()  # Ensure admin exists
 
 class User(db.Model, UserMixin): 
@@ -36,7 +54,7 @@ class User(db.Model, UserMixin):
     email = db.Column(db.String(120), unique=True, nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
     
-    branch_id = db.Column(db.Integer, db.ForeignKey('branch.id'), nullable=False) 
+    branch_id = db.Column(db.Integer, db.ForeignKey('branch.id'), nullable=False, index=True) 
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -56,7 +74,7 @@ class Subject(db.Model):
     __tablename__ = 'subject'
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
-    branch_id = db.Column(db.Integer, db.ForeignKey('branch.id'), nullable=False)
+    branch_id = db.Column(db.Integer, db.ForeignKey('branch.id'), nullable=False, index=True)
 
     # Relationships
     chapters = db.relationship('Chapter', back_populates='subject', lazy=True) 
@@ -66,7 +84,7 @@ class Chapter(db.Model):
     __tablename__ = 'chapter'
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
-    subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
+    subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False, index=True)
 
     # Relationship
     subject = db.relationship('Subject', back_populates='chapters')
@@ -75,12 +93,13 @@ class Chapter(db.Model):
 class Quiz(db.Model):
     __tablename__ = 'quiz'
     id = db.Column(db.Integer, primary_key=True)
-    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id'), nullable=False)  
-    subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
+    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id'), nullable=False, index=True)  
+    subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False, index=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
     nos = db.Column(db.Integer, nullable=False)
     time = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")  # Bumped on every edit (see quiz_versions.py)
 
     # Relationships
     questions = db.relationship('Question', backref='quiz', lazy=True)
@@ -89,7 +108,7 @@ class Quiz(db.Model):
 class Question(db.Model):
     __tablename__ = 'question'
     id = db.Column(db.Integer, primary_key=True)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False, index=True)
     question_text = db.Column(db.String(500), nullable=False)
     option1 = db.Column(db.String(100), nullable=False)
     option2 = db.Column(db.String(100), nullable=False)
@@ -100,10 +119,94 @@ class Question(db.Model):
 
 class Score(db.Model):
     __tablename__ = 'score'
+    __table_args__ = (
+        # Covers the profile attempts list and the per-user stats rebuild (also serves plain user_id lookups)
+        db.Index('ix_score_user_quiz_score', 'user_id', 'quiz_id', 'score'),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     score = db.Column(db.Integer, nullable=False)
     
     # Relationships
     user = db.relationship('User', backref='scores', lazy=True)
+
+class Response(db.Model):
+    __tablename__ = 'response'
+    id = db.Column(db.Integer, primary_key=True)
+    score_id = db.Column(db.Integer, db.ForeignKey('score.id'), nullable=False, index=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
+    selected = db.Column(db.SmallInteger, nullable=True)  # option number (1-4), NULL if left unanswered
+
+# Server-side record of a paged quiz attempt (see quiz_attempts.py); answers are autosaved as they're picked
+class QuizAttempt(db.Model):
+    __tablename__ = 'quiz_attempt'
+    __table_args__ = (
+        db.Index('ix_quiz_attempt_user_quiz', 'user_id', 'quiz_id'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
+    started_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    submitted_at = db.Column(db.DateTime, nullable=True)  # NULL while the attempt is open
+    score = db.Column(db.Integer, nullable=True)
+    question_ids = db.Column(db.Text, nullable=True)  # Comma-separated drawn questions; NULL = the whole quiz
+
+class AttemptAnswer(db.Model):
+    __tablename__ = 'attempt_answer'
+    attempt_id = db.Column(db.Integer, db.ForeignKey('quiz_attempt.id'), primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), primary_key=True)
+    selected = db.Column(db.SmallInteger, nullable=True)  # option number (1-4), NULL if cleared
+
+# Materialized leaderboards (see leaderboards.py): board is 'quiz' (best score) or 'branch' (sum of bests)
+class LeaderboardEntry(db.Model):
+    __tablename__ = 'leaderboard_entry'
+    __table_args__ = (
+        db.Index('ix_leaderboard_board_score', 'board', 'board_id', 'score'),  # Top-k reads
+    )
+    board = db.Column(db.String(10), primary_key=True)
+    board_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    score = db.Column(db.Integer, nullable=False)
+
+# Cached item analysis per question and per quiz (see item_analysis.py), recomputed on demand
+class ItemStats(db.Model):
+    __tablename__ = 'item_stats'
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), primary_key=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False, index=True)
+    attempts = db.Column(db.Integer, nullable=False)  # Attempts that were shown the question
+    difficulty = db.Column(db.Float, nullable=True)  # Share answered correctly (p-value)
+    discrimination = db.Column(db.Float, nullable=True)  # Point-biserial vs the rest of the attempt
+    blank = db.Column(db.Integer, nullable=False)
+    picked1 = db.Column(db.Integer, nullable=False)
+    picked2 = db.Column(db.Integer, nullable=False)
+    picked3 = db.Column(db.Integer, nullable=False)
+    picked4 = db.Column(db.Integer, nullable=False)
+
+class QuizReliability(db.Model):
+    __tablename__ = 'quiz_reliability'
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False)
+    complete = db.Column(db.Integer, nullable=False)  # Attempts that saw every question (used for alpha)
+    alpha = db.Column(db.Float, nullable=True)  # Cronbach's alpha
+    computed_at = db.Column(db.DateTime, nullable=False)
+
+# Quizzes an admin put in exam-start surge mode (see surge.py); shared by every worker process
+class QuizSurge(db.Model):
+    __tablename__ = 'quiz_surge'
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), primary_key=True)
+    until = db.Column(db.DateTime, nullable=False)  # UTC end of the surge window
+
+# Materialized per-user totals, kept in step with Score inserts (see user_stats.py)
+class UserStats(db.Model):
+    __tablename__ = 'user_stats'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    total_score = db.Column(db.Integer, nullable=False, default=0)
+
+class UserSubjectStats(db.Model):
+    __tablename__ = 'user_subject_stats'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    total_score = db.Column(db.Integer, nullable=False, default=0)
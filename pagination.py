@@ -0,0 +1,62 @@
+from flask import current_app, request
+
+# ⪼ Keyset (cursor) pagination
+# Pages are addressed by the id of the last/first row shown (?after=<id> / ?before=<id>), so every
+# page is an indexed range scan of page_size + 1 rows, however large the table gets.
+
+class KeysetPage:
+    def __init__(self, items, page_size, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.page_size = page_size
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _int_arg(name):
+    value = request.args.get(name, "")
+    return int(value) if value.isdigit() else None
+
+
+def page_size_from_request():
+    size = _int_arg("per_page") or current_app.config["PAGE_SIZE"]
+    return max(1, min(size, current_app.config["MAX_PAGE_SIZE"]))
+
+
+def keyset_paginate(query, key_column, after=None, before=None, page_size=50):
+    # key_column must be unique (the primary key) so the order is stable between pages
+    key = key_column.key
+
+    if before is not None:
+        rows = query.filter(key_column < before).order_by(key_column.desc()).limit(page_size + 1).all()
+        has_prev = len(rows) > page_size
+        items = list(reversed(rows[:page_size]))
+        has_next = True  # We came back from the page after this one
+    else:
+        if after is not None:
+            query = query.filter(key_column > after)
+        rows = query.order_by(key_column.asc()).limit(page_size + 1).all()
+        has_next = len(rows) > page_size
+        items = rows[:page_size]
+        has_prev = after is not None
+
+    return KeysetPage(
+        items,
+        page_size,
+        next_cursor=getattr(items[-1], key) if items and has_next else None,
+        prev_cursor=getattr(items[0], key) if items and has_prev else None,
+    )
+
+
+def paginate_from_request(query, key_column):
+    return keyset_paginate(
+        query, key_column,
+        after=_int_arg("after"),
+        before=_int_arg("before"),
+        page_size=page_size_from_request()
+    )
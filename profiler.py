@@ -0,0 +1,260 @@
+import cProfile
+import json
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from fnmatch import fnmatchcase
+from threading import Lock
+from flask import current_app, g, request
+
+# ⪼ On-demand request profiler
+# Off by default. An admin turns it on from /admin/profiler for a share of all requests and/or for
+# endpoints matching patterns (e.g. routes.quiz, admin.manage_*). A chosen request runs under
+# cProfile, and a sampler thread snapshots its Python stack every PROFILE_STACK_INTERVAL_MS.
+# Both are aggregated per endpoint in process memory:
+#   pstats    - per-function call counts and own/cumulative time (the "hot functions" table)
+#   collapsed - "frame;frame;frame count" lines, the input format of flamegraph.pl and speedscope
+# dump_profiles() writes <endpoint>.<pid>.pstats and <endpoint>.<pid>.collapsed files under PROFILE_DIR.
+# Only one request is profiled at a time per process (cProfile can't nest), so the overhead stays
+# bounded however high the rate is set.
+#
+# The admin's settings and dump/reset requests go to PROFILE_DIR/settings.json, which every worker
+# re-reads (when its mtime changes) at most every PROFILE_SETTINGS_TTL seconds, so a toggle reaches
+# all processes and each one writes its own dump files. The file outlives restarts; until it exists,
+# the PROFILE_* config values apply.
+
+_settings = {"enabled": False, "rate": 0.0, "endpoints": ()}
+_lock = Lock()
+_busy = Lock()  # Held while a request is being profiled
+_profiles = {}  # endpoint -> pstats.Stats
+_stacks = {}  # endpoint -> Counter of collapsed stacks
+_requests = Counter()  # endpoint -> profiled requests
+_seconds = Counter()  # endpoint -> wall time of profiled requests
+_active = {}  # thread ident -> endpoint being sampled
+_sampler = None
+_shared = {"checked": 0.0, "mtime": None, "dump_at": None, "reset_at": None}  # Last seen state of settings.json
+_sync_lock = Lock()
+
+
+def configure(enabled=None, rate=None, endpoints=None):
+    with _lock:
+        if enabled is not None:
+            _settings["enabled"] = enabled
+        if rate is not None:
+            _settings["rate"] = min(max(rate, 0.0), 1.0)
+        if endpoints is not None:
+            _settings["endpoints"] = tuple(pattern.strip() for pattern in endpoints if pattern.strip())
+
+
+def settings():
+    with _lock:
+        return dict(_settings)
+
+
+def reset_profiles():
+    with _lock:
+        _profiles.clear()
+        _stacks.clear()
+        _requests.clear()
+        _seconds.clear()
+
+
+def profile_dir():
+    return current_app.config["PROFILE_DIR"] or os.path.join(current_app.instance_path, "profiles")
+
+
+def _settings_path():
+    return os.path.join(profile_dir(), "settings.json")
+
+
+def save_settings(enabled=None, rate=None, endpoints=None, dump=False, reset=False):
+    # Writes settings.json for every worker and applies it here at once; returns the files this
+    # worker wrote when a dump was requested
+    _sync(force=True)  # Start from what the other workers last saved
+    current, previous = settings(), _read_settings() or {}
+    data = {
+        "enabled": current["enabled"] if enabled is None else enabled,
+        "rate": current["rate"] if rate is None else min(max(rate, 0.0), 1.0),
+        "endpoints": list(current["endpoints"] if endpoints is None else
+                          (pattern.strip() for pattern in endpoints if pattern.strip())),
+        "dump_at": time.time() if dump else previous.get("dump_at"),
+        "reset_at": time.time() if reset else previous.get("reset_at"),
+    }
+    os.makedirs(profile_dir(), exist_ok=True)
+    temporary = f"{_settings_path()}.{os.getpid()}"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(temporary, _settings_path())  # Atomic: readers never see half a file
+    return _sync(force=True)
+
+
+def _read_settings():
+    try:
+        with open(_settings_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _sync(force=False):
+    # Applies settings.json if it changed since this worker last looked; returns any dump files written
+    now = time.monotonic()
+    if not force and now - _shared["checked"] < current_app.config["PROFILE_SETTINGS_TTL"]:
+        return []
+    if not _sync_lock.acquire(blocking=force):
+        return []  # Another thread of this worker is already checking
+    try:
+        _shared["checked"] = now
+        try:
+            mtime = os.stat(_settings_path()).st_mtime_ns
+        except OSError:
+            return []
+        data = _read_settings()
+        if mtime == _shared["mtime"] or data is None:
+            return []
+        started = _shared["mtime"] is None  # First read in this process: earlier requests aren't ours to replay
+        _shared["mtime"] = mtime
+        configure(enabled=data["enabled"], rate=data["rate"], endpoints=data["endpoints"])
+        written = []
+        if data.get("reset_at") != _shared["reset_at"]:
+            _shared["reset_at"] = data.get("reset_at")
+            if not started:
+                reset_profiles()
+        if data.get("dump_at") != _shared["dump_at"]:
+            _shared["dump_at"] = data.get("dump_at")
+            if not started:
+                written = dump_profiles()
+        return written
+    finally:
+        _sync_lock.release()
+
+
+def _wanted(endpoint):
+    if not _settings["enabled"] or endpoint is None or endpoint == "static":
+        return False
+    if any(fnmatchcase(endpoint, pattern) for pattern in _settings["endpoints"]):
+        return True
+    return random.random() < _settings["rate"]
+
+
+# ⪼ Stack sampler
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _sample_loop(interval):
+    while True:
+        time.sleep(interval)
+        with _lock:
+            targets = dict(_active)
+        if not targets:
+            continue
+        frames = sys._current_frames()
+        for ident, endpoint in targets.items():
+            frame = frames.get(ident)
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            if labels:
+                with _lock:
+                    _stacks.setdefault(endpoint, Counter())[";".join(reversed(labels))] += 1
+
+
+def _ensure_sampler(interval):
+    global _sampler
+    with _lock:
+        if _sampler is None or not _sampler.is_alive():
+            _sampler = threading.Thread(target=_sample_loop, args=(interval,), name="request-profiler", daemon=True)
+            _sampler.start()
+
+
+# ⪼ Request hooks
+def _start_profile():
+    _sync()
+    if not _wanted(request.endpoint) or not _busy.acquire(blocking=False):
+        return
+    _ensure_sampler(current_app.config["PROFILE_STACK_INTERVAL_MS"] / 1000)
+    with _lock:
+        _active[threading.get_ident()] = request.endpoint
+    g.profile_started = time.perf_counter()
+    g.profiler = cProfile.Profile()
+    g.profiler.enable()
+
+
+def _finish_profile(exc):
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return
+    profiler.disable()
+    elapsed = time.perf_counter() - g.pop("profile_started")
+    endpoint = request.endpoint
+    with _lock:
+        _active.pop(threading.get_ident(), None)
+        stats = _profiles.get(endpoint)
+        if stats is None:
+            _profiles[endpoint] = pstats.Stats(profiler)
+        else:
+            stats.add(profiler)
+        _requests[endpoint] += 1
+        _seconds[endpoint] += elapsed
+    _busy.release()
+
+
+def init_profiler(app):
+    configure(enabled=app.config["PROFILE_ENABLED"], rate=app.config["PROFILE_SAMPLE_RATE"],
+              endpoints=app.config["PROFILE_ENDPOINTS"].split(","))
+    app.before_request(_start_profile)
+    app.teardown_request(_finish_profile)
+
+
+# ⪼ Reports
+def hot_functions(endpoint, limit=15, sort="tottime"):
+    # [(function label, calls, own seconds, cumulative seconds)] for the endpoint, hottest first
+    index = 3 if sort == "cumtime" else 2
+    with _lock:
+        stats = _profiles.get(endpoint)
+        rows = list(stats.stats.items()) if stats else []
+    rows.sort(key=lambda item: item[1][index], reverse=True)
+    return [(func if file == "~" else f"{func} ({os.path.basename(file)}:{line})",  # "~" marks C builtins
+             calls, round(own, 6), round(cumulative, 6))
+            for (file, line, func), (_, calls, own, cumulative, _) in rows[:limit]]
+
+
+def profile_summary():
+    # {endpoint: (profiled requests, mean milliseconds, stack samples)}
+    with _lock:
+        return {endpoint: (count, round(1000 * _seconds[endpoint] / count, 2),
+                           sum(_stacks.get(endpoint, Counter()).values()))
+                for endpoint, count in sorted(_requests.items())}
+
+
+def profiler_stats():
+    # Flat numbers for /admin/metrics
+    with _lock:
+        return {"enabled": int(_settings["enabled"]), "sample_rate": _settings["rate"],
+                "profiled_requests": sum(_requests.values()), "endpoints": len(_requests)}
+
+
+def dump_profiles(directory=None):
+    # Writes <endpoint>.<pid>.pstats and <endpoint>.<pid>.collapsed per profiled endpoint; returns the file paths
+    directory = directory or profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    with _lock:  # Profiled requests finishing meanwhile wait rather than change the stats mid-write
+        for endpoint in sorted(set(_profiles) | set(_stacks)):
+            base = os.path.join(directory, re.sub(r"[^\w.-]", "_", endpoint) + f".{os.getpid()}")
+            if endpoint in _profiles:
+                _profiles[endpoint].dump_stats(base + ".pstats")
+                written.append(base + ".pstats")
+            if _stacks.get(endpoint):
+                with open(base + ".collapsed", "w", encoding="utf-8") as f:
+                    f.writelines(f"{stack} {count}\n" for stack, count in sorted(_stacks[endpoint].items()))
+                written.append(base + ".collapsed")
+    return written
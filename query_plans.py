@@ -0,0 +1,73 @@
+from sqlalchemy import func, text
+from models import db, User, Branch, Subject, Quiz, Question, Score, Response, UserSubjectStats
+
+# ⪼ Query-plan verification
+# The hot queries issued by routes.py (and the services behind it), with sample parameters.
+# Each entry: (name, statement, tables that may legitimately be scanned in full).
+
+def hot_queries():
+    return [
+        ("login", User.query.filter_by(username="admin").statement, ()),
+        ("homepage quizzes",
+         Quiz.query.join(Subject).filter(Subject.branch_id == 1).statement, ()),
+        ("quiz questions", Question.query.filter_by(quiz_id=1).statement, ()),
+        ("answer key",
+         db.session.query(Question.id, Question.ans, Question.marks)
+         .filter(Question.quiz_id == 1).order_by(Question.id).statement, ()),
+        ("end quiz question count",
+         db.session.query(func.count(Question.id)).filter(Question.quiz_id == 1).statement, ()),
+        ("profile attempts",
+         db.session.query(Quiz.name, Score.score).join(Quiz).filter(Score.user_id == 1).statement, ()),
+        ("profile top subject",
+         db.session.query(Subject.name, UserSubjectStats.total_score)
+         .join(Subject, Subject.id == UserSubjectStats.subject_id)
+         .filter(UserSubjectStats.user_id == 1)
+         .order_by(UserSubjectStats.total_score.desc()).limit(1).statement, ()),
+        ("stats rebuild per subject",
+         db.session.query(Score.user_id, Quiz.subject_id, func.count(Score.id), func.sum(Score.score))
+         .join(Quiz, Quiz.id == Score.quiz_id)
+         .filter(Score.user_id.in_([1, 2]))
+         .group_by(Score.user_id, Quiz.subject_id).statement, ()),
+        ("regrade responses",
+         db.session.query(Response.score_id, Response.question_id, Response.selected)
+         .join(Score, Score.id == Response.score_id)
+         .filter(Score.quiz_id == 1).statement, ()),
+        # Whole-table aggregates: scanning a covering index is expected, the small branch table may be scanned
+        ("dashboard branch users",
+         db.session.query(Branch.name, func.count(User.id)).select_from(User)
+         .outerjoin(Branch, Branch.id == User.branch_id)
+         .group_by(User.branch_id, Branch.name).statement, ("branch",)),
+        ("dashboard branch quizzes",
+         db.session.query(Branch.name, func.count(Quiz.id)).select_from(Quiz)
+         .join(Subject, Quiz.subject_id == Subject.id)
+         .join(Branch, Subject.branch_id == Branch.id)
+         .group_by(Subject.branch_id, Branch.name).statement, ("branch", "subject")),
+    ]
+
+
+def explain(statement):
+    sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in db.session.execute(text("EXPLAIN QUERY PLAN " + sql))]
+
+
+def full_scans(plan, allowed_tables=()):
+    # "SCAN <table>" without an index is a full table scan; "SCAN ... USING (COVERING) INDEX" is not
+    scans = []
+    for detail in plan:
+        if detail.startswith("SCAN ") and "INDEX" not in detail:
+            table = detail.split()[1]
+            if table not in allowed_tables:
+                scans.append(detail)
+    return scans
+
+
+def create_missing_indexes():
+    created = []
+    existing = {row[0] for row in db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=db.session.connection())  # Same connection, so the plans below see it
+                created.append(index.name)
+    db.session.commit()
+    return created
@@ -0,0 +1,36 @@
+import random
+from answer_keys import get_answer_key
+
+# ⪼ Question sampling
+# A quiz whose bank holds more questions than Quiz.nos gives each attempt nos of them at random.
+# The draw indexes into the cached answer key (the quiz's sorted question id array), so it costs
+# O(nos) and never runs ORDER BY RANDOM() over the question table. It's seeded per attempt and the
+# drawn ids are saved on the attempt, so a reload shows the same questions and grading checks only
+# those.
+
+
+def draw_questions(key, nos, seed):
+    # Sorted question ids for one attempt, or None when nos covers the whole bank
+    if not nos or nos >= len(key):
+        return None
+    picked = random.Random(seed).sample(range(len(key)), nos)
+    return sorted(key.question_ids[i] for i in picked)
+
+
+def assign_questions(attempt, nos):
+    drawn = draw_questions(get_answer_key(attempt.quiz_id), nos, seed=f"{attempt.quiz_id}:{attempt.id}")
+    attempt.question_ids = None if drawn is None else ",".join(map(str, drawn))
+
+
+def drawn_question_ids(attempt):
+    # The attempt's questions, or None for every question of the quiz
+    if attempt.question_ids is None:
+        return None
+    return [int(qid) for qid in attempt.question_ids.split(",") if qid]
+
+
+def attempt_key(attempt):
+    # Answer key restricted to the questions the attempt was given
+    key = get_answer_key(attempt.quiz_id)
+    drawn = drawn_question_ids(attempt)
+    return key if drawn is None else key.subset(drawn)
@@ -0,0 +1,122 @@
+from datetime import datetime, timezone
+from sqlalchemy import update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import db, Question, QuizAttempt, AttemptAnswer
+from answer_keys import grade_submission, selected_options
+from question_sampling import assign_questions, drawn_question_ids, attempt_key
+from pagination import keyset_paginate
+from score_writer import Attempt, record_score, write_attempts
+
+# ⪼ Paged quiz attempts
+# The quiz page is an empty shell; questions are fetched in keyset chunks as the student scrolls,
+# and answers are autosaved in small batches to attempt_answer. Submitting grades from the saved
+# answers, so a dropped connection loses at most the last unsaved batch.
+
+OPTIONS = {"1": 1, "2": 2, "3": 3, "4": 4}
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)  # SQLite hands DateTimes back naive
+
+
+def find_open_attempt(user_id, quiz_id):
+    # The user's unfinished attempt at this quiz, if any; never writes
+    return QuizAttempt.query.filter_by(user_id=user_id, quiz_id=quiz_id, submitted_at=None) \
+        .order_by(QuizAttempt.id.desc()).first()
+
+
+def open_attempt(user_id, quiz_id, nos=None):
+    # Resume the user's unfinished attempt at this quiz, or start a new one with nos questions drawn
+    attempt = find_open_attempt(user_id, quiz_id)
+    if attempt is None:
+        attempt = QuizAttempt(user_id=user_id, quiz_id=quiz_id, started_at=_utcnow())
+        db.session.add(attempt)
+        db.session.flush()  # The draw is seeded with the attempt id
+        assign_questions(attempt, nos)
+        db.session.commit()
+    return attempt
+
+
+def seconds_left(attempt, quiz_time):
+    elapsed = (_utcnow() - attempt.started_at.replace(tzinfo=None)).total_seconds()
+    return max(0, int(quiz_time - elapsed))
+
+
+def question_chunk(attempt, after=None, size=10):
+    # One keyset page of the attempt's questions (no answers), with whatever the student already picked
+    query = db.session.query(Question.id, Question.question_text,
+                             Question.option1, Question.option2, Question.option3, Question.option4)
+    drawn = drawn_question_ids(attempt)
+    query = query.filter(Question.quiz_id == attempt.quiz_id) if drawn is None else query.filter(Question.id.in_(drawn))
+    page = keyset_paginate(query, Question.id, after=after, page_size=size)
+    ids = [row.id for row in page]
+    picked = dict(db.session.query(AttemptAnswer.question_id, AttemptAnswer.selected)
+                  .filter(AttemptAnswer.attempt_id == attempt.id, AttemptAnswer.question_id.in_(ids))) if ids else {}
+    questions = [
+        {"id": row.id, "text": row.question_text,
+         "options": [row.option1, row.option2, row.option3, row.option4], "selected": picked.get(row.id)}
+        for row in page
+    ]
+    return questions, page.next_cursor
+
+
+def save_answers(attempt, answers):
+    # answers: {question_id: option or None}. Ids outside the attempt are ignored; one upsert per batch.
+    valid = set(attempt_key(attempt).question_ids)
+    rows = []
+    for question_id, selected in answers.items():
+        question_id = int(question_id) if str(question_id).isdigit() else None
+        if question_id in valid:
+            rows.append({"attempt_id": attempt.id, "question_id": question_id,
+                         "selected": OPTIONS.get(str(selected))})
+    if rows:
+        stmt = sqlite_insert(AttemptAnswer)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=["attempt_id", "question_id"], set_={"selected": stmt.excluded.selected}
+        ), rows)
+        db.session.commit()
+    return len(rows)
+
+
+def submit_attempt(app, attempt, subject_id, form=None):
+    # Grades the saved answers, or a submitted quiz form when one is given, against the drawn questions.
+    # Claim the attempt first so a double submit (retry, second tab) is graded only once
+    claimed = db.session.execute(
+        update(QuizAttempt).where(QuizAttempt.id == attempt.id, QuizAttempt.submitted_at.is_(None))
+        .values(submitted_at=_utcnow())
+    ).rowcount
+    if not claimed:
+        db.session.rollback()
+        db.session.refresh(attempt)
+        return attempt.score or 0
+
+    key = attempt_key(attempt)
+    if form is None:
+        saved = dict(db.session.query(AttemptAnswer.question_id, AttemptAnswer.selected)
+                     .filter(AttemptAnswer.attempt_id == attempt.id))
+        form = {field: str(saved[qid]) for qid, field in zip(key.question_ids, key.fields) if saved.get(qid)}
+    score = grade_submission(key, form)
+    db.session.execute(update(QuizAttempt).where(QuizAttempt.id == attempt.id).values(score=score))
+    graded = Attempt(attempt.user_id, attempt.quiz_id, subject_id, score, selected_options(key, form))
+
+    if not app.config["SCORE_WRITE_BEHIND"]:
+        # The claim and the Score row commit together: a failed write leaves the attempt open to resubmit
+        try:
+            write_attempts([graded])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return score
+
+    db.session.commit()
+    try:
+        record_score(app, graded)
+    except Exception:
+        # The Score never got queued or written: release the claim so the student isn't locked out
+        db.session.rollback()
+        db.session.execute(update(QuizAttempt).where(QuizAttempt.id == attempt.id)
+                           .values(submitted_at=None, score=None))
+        db.session.commit()
+        raise
+    return score
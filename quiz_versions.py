@@ -0,0 +1,38 @@
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session, attributes
+from models import Quiz, Question
+
+# ⪼ Quiz versions
+# Quiz.version goes up by one whenever the quiz or any of its questions changes, so API clients can
+# revalidate with a strong ETag ("quiz-<id>-v<version>-a<attempt>") instead of downloading the quiz again.
+# ORM writes are picked up by the flush hook below. Core bulk writes call bump_quiz_versions() directly.
+
+def bump_quiz_versions(session, quiz_ids):
+    quiz_ids = {int(q) for q in quiz_ids if q is not None}
+    if quiz_ids:
+        session.execute(update(Quiz).where(Quiz.id.in_(quiz_ids)).values(version=Quiz.version + 1)
+                        .execution_options(synchronize_session=False))
+
+
+def _question_quiz_ids(session):
+    quiz_ids = set()
+    for obj in session.new | session.deleted:
+        if isinstance(obj, Question):
+            quiz_ids.add(obj.quiz_id)
+    for obj in session.dirty:
+        if isinstance(obj, Question) and session.is_modified(obj, include_collections=False):
+            history = attributes.get_history(obj, "quiz_id")
+            quiz_ids.update(history.deleted or ())  # A question moved out of its old quiz
+            quiz_ids.add(obj.quiz_id)
+    return quiz_ids
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_on_flush(session, flush_context, instances):
+    bumped = set()
+    for obj in session.dirty:
+        if isinstance(obj, Quiz) and session.is_modified(obj, include_collections=False):
+            obj.version = Quiz.version + 1  # Rendered as SET version = version + 1
+            bumped.add(obj.id)
+    deleted = {obj.id for obj in session.deleted if isinstance(obj, Quiz)}
+    bump_quiz_versions(session, _question_quiz_ids(session) - bumped - deleted)
@@ -1,9 +1,31 @@
+import io
+import logging
+import os
 from datetime import time
 from functools import wraps
-from flask import Blueprint, render_template, request, flash, redirect, url_for
-from models import db, User, Branch, Subject, Chapter, Quiz, Question, Score
+from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app, abort, jsonify
+from models import db, User, Branch, Subject, Chapter, Quiz, Question, Score, QuizAttempt, ItemStats, QuizReliability
 from flask_login import login_user, logout_user, login_required, current_user
-from sqlalchemy import func, desc  
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+from answer_keys import invalidate_answer_key, answer_key_stats
+from regrade import regrade_quiz
+from item_analysis import analyze_quizzes
+from user_stats import get_user_stats, top_subject
+from score_writer import score_writer_stats
+from dashboard import get_dashboard
+from search_index import search
+from pagination import paginate_from_request
+from identity_cache import invalidate_identity, identity_cache_stats
+from instrumentation import render_prometheus
+from fragment_cache import fragment_cache_stats
+from leaderboards import QUIZ, BRANCH, rank, top
+from question_sampling import drawn_question_ids
+from surge import start_surge, end_surge, surge_quiz, surge_questions, admit, surge_stats, active_surges
+from profiler import save_settings, settings, hot_functions, profile_summary, profiler_stats
+from quiz_attempts import open_attempt, seconds_left, question_chunk, save_answers, submit_attempt
+
+log = logging.getLogger(__name__)
 
 # ⪼ Define the Blueprint
 routes_bp = Blueprint("routes", __name__)
@@ -68,7 +90,7 @@ def login():
             return redirect(url_for('routes.login'))
 
         login_user(user)  #  Flask-Login handles session management
-        print(f"User Logged In: {current_user.is_authenticated}, ID: {current_user.id}")
+        log.info("User logged in: id=%s", user.id)
 
         flash("Login successful!", "success")
         return redirect(url_for('routes.homepage') if not user.is_admin else url_for('admin.admin_home'))
@@ -102,33 +124,16 @@ def homepage():
 @routes_bp.route("/profile", methods=['GET'])
 @login_required
 def profile():
-    # Fetch the top 1 subject with the highest score
-    subject_scores = (
-        db.session.query(Subject.name.label("subject"), func.sum(Score.score).label("score"))
-        .join(Quiz, Quiz.id == Score.quiz_id)
-        .join(Subject, Subject.id == Quiz.subject_id)
-        .filter(Score.user_id == current_user.id)
-        .group_by(Subject.name)
-        .order_by(desc("score"))
-        .limit(1)  # Fetch top 1 subject
-        .all()
-    )
-
-    subject_scores = [{"subject": row.subject, "score": row.score} for row in subject_scores]
+    # Totals come from the materialized user_stats tables (primary-key lookups)
+    stats = get_user_stats(current_user.id)
+    top = top_subject(current_user.id)
+    subject_scores = [{"subject": top.subject, "score": top.score}] if top else []
 
     # Fetch correct vs wrong questions
-    quiz_stats = db.session.query(
-        func.count(Score.id).label("attempted"),
-        func.coalesce(func.sum(Score.score), 0).label("correct")
-    ).filter(Score.user_id == current_user.id).first()
-
-    if quiz_stats:
-        correct_wrong_attempts = {
-            "correct": quiz_stats.correct or 0,  # Handle None as 0
-            "wrong": quiz_stats.attempted - (quiz_stats.correct or 0)
-        }
-    else:
-        correct_wrong_attempts = {"correct": 0, "wrong": 0}  # Ensure it's always defined
+    correct_wrong_attempts = {
+        "correct": stats.total_score,
+        "wrong": stats.attempts - stats.total_score
+    }
 
     # Fetch the attempted quizzes and their scores
     quiz_attempts = db.session.query(Quiz.name.label("quiz_name"), Score.score).join(Quiz).filter(Score.user_id == current_user.id).all()
@@ -157,28 +162,93 @@ def logout():
 @login_required
 @admin_only
 def admin_dashboard():
-    users_count = User.query.count()
-    quizzes_count = Quiz.query.count()
-    
-    # Users Count per Branch (Bar Chart)
-    branch_users = db.session.query(User.branch, db.func.count(User.id)).group_by(User.branch).all()
-    branch_users = [{"branch": row[0], "count": row[1]} for row in branch_users]
-
-    # Total Quizzes Created per Branch (Pie Chart) - FIXED
-    branch_quizzes = db.session.query(Branch.name, db.func.count(Quiz.id)) \
-        .join(Subject, Quiz.subject_id == Subject.id) \
-        .join(Branch, Subject.branch_id == Branch.id) \
-        .group_by(Branch.name).all()
-    branch_quizzes = [{"branch": row[0], "count": row[1]} for row in branch_quizzes]
+    # Aggregates are cached by the dashboard service and dropped on relevant writes
+    data, age = get_dashboard()
 
     return render_template(
         'admin/admin_dashboard.html',
-        users_count=users_count,
-        quizzes_count=quizzes_count,
-        branch_users=branch_users,
-        branch_quizzes=branch_quizzes
+        users_count=data["users_count"],
+        quizzes_count=data["quizzes_count"],
+        branch_users=data["branch_users"],
+        branch_quizzes=data["branch_quizzes"],
+        data_age=int(age)
     )
 
+# ⪼ Admin Metrics (Prometheus text format)________________________
+@admin_bp.route("/metrics")
+@login_required
+@admin_only
+def metrics():
+    body = render_prometheus({
+        "answer_key_cache": answer_key_stats(),
+        "identity_cache": identity_cache_stats(),
+        "score_writer": score_writer_stats(),
+        "fragment_cache": fragment_cache_stats(),
+        "surge": surge_stats(),
+        "profiler": profiler_stats(),
+    })
+    return body, 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+# ⪼ Exam surge mode (pre-warming and admission control, see surge.py)__
+@admin_bp.route("/surge", methods=["GET", "POST"])
+@login_required
+@admin_only
+def surge_mode():
+    if request.method == "POST":
+        quiz_id = request.form.get("quiz_id", "")
+        if not quiz_id.isdigit():
+            abort(400)
+        if request.form.get("action") == "end":
+            end_surge(int(quiz_id))
+            flash("Surge mode ended.", "success")
+        else:
+            minutes = request.form.get("minutes", "")
+            try:
+                surge = start_surge(int(quiz_id), int(minutes) if minutes.isdigit() and int(minutes) > 0 else None)
+                flash(f"{surge.meta.name} is warmed ({len(surge.questions)} questions); starts are now rate limited.",
+                      "success")
+            except ValueError as e:
+                flash(str(e), "error")
+        return redirect(url_for("admin.surge_mode"))
+
+    quizzes = db.session.query(Quiz.id, Quiz.name).order_by(Quiz.name).all()
+    return render_template("admin/surge.html", quizzes=quizzes, surges=active_surges(), stats=surge_stats())
+
+# ⪼ Request profiler (cProfile + stack samples per endpoint, see profiler.py)__
+PROFILED_PAGES = ("routes.quiz", "routes.profile", "admin.manage_branch", "admin.manage_subject", "admin.manage_chapter",
+                  "admin.manage_quiz", "admin.manage_question", "admin.manage_user")
+
+@admin_bp.route("/profiler", methods=["GET", "POST"])
+@login_required
+@admin_only
+def request_profiler():
+    if request.method == "POST":
+        action = request.form.get("action")
+        # Saved for every worker; each one applies it (and writes its own dump files) on its next request
+        if action == "dump":
+            written = save_settings(dump=True)
+            flash(f"This worker wrote {len(written)} files: {', '.join(written)}. Other workers write theirs "
+                  f"on their next request." if written else "Dump requested; this worker has nothing profiled yet.",
+                  "success")
+        elif action == "reset":
+            save_settings(reset=True)
+            flash("Profiles cleared on every worker.", "success")
+        else:
+            try:
+                rate = float(request.form.get("rate") or 0)
+            except ValueError:
+                abort(400)
+            save_settings(enabled="enabled" in request.form, rate=rate,
+                          endpoints=request.form.get("endpoints", "").split(","))
+            flash("Profiler settings saved for every worker.", "success")
+        return redirect(url_for("admin.request_profiler", sort=request.args.get("sort")))
+
+    sort = "cumtime" if request.args.get("sort") == "cumtime" else "tottime"
+    summary = profile_summary()
+    endpoints = list(PROFILED_PAGES) + sorted(set(summary) - set(PROFILED_PAGES))
+    return render_template("admin/profiler.html", settings=settings(), summary=summary, sort=sort, pid=os.getpid(),
+                           hot={endpoint: hot_functions(endpoint, sort=sort) for endpoint in endpoints})
+
 # ⪼ Admin Home___________________________________________________
 @admin_bp.route("/admin_home")
 @login_required
@@ -195,9 +265,10 @@ def admin_search():
     if not query:
         return render_template("admin/search.html", results=[])
 
-    user_results = User.query.filter(User.name.ilike(f"%{query}%") | User.email.ilike(f"%{query}%")).all()
-    subject_results = Subject.query.filter(Subject.name.ilike(f"%{query}%")).all()
-    quiz_results = Quiz.query.filter(Quiz.name.ilike(f"%{query}%")).all()
+    # Ranked full-text matches (see search_index.py)
+    user_results = search(User, query)
+    subject_results = search(Subject, query)
+    quiz_results = search(Quiz, query)
 
     return render_template(
         "admin/search.html",
@@ -216,7 +287,7 @@ from forms import BranchForm
 @admin_only
 def manage_branch():
     form = BranchForm()
-    branches = Branch.query.all()  # Fetch all branches
+    page = paginate_from_request(Branch.query, Branch.id)  # One page of branches
 
     # Get the branch_id for editing
     branch_id = request.args.get('branch_id')
@@ -242,18 +313,22 @@ def manage_branch():
 
         return redirect(url_for("admin.manage_branch"))
 
-    # Handle deleting a branch
+    # Handle deleting a branch (and everything under it, see bulk_ops.py)
     delete_branch_id = request.args.get('delete_branch_id')
     if delete_branch_id:
         branch = Branch.query.get(delete_branch_id)
         if branch:
-            db.session.delete(branch)
-            db.session.commit()
-            flash(f"Branch {branch.name} deleted successfully!", "success")
+            name = branch.name
+            try:
+                delete_items("branch", [branch.id])
+                flash(f"Branch {name} deleted successfully!", "success")
+            except ValueError as e:
+                db.session.rollback()
+                flash(str(e), "error")
 
         return redirect(url_for("admin.manage_branch"))
 
-    return render_template("admin/manage_branch.html", form=form, branches=branches)
+    return render_template("admin/manage_branch.html", form=form, branches=page.items, page=page)
 
 
 # ⪼ Manage Subjects_________________________________________________
@@ -265,7 +340,8 @@ from forms import SubjectForm
 def manage_subject():
     form = SubjectForm()
     form.branch_id.choices = [(b.id, b.name) for b in Branch.query.all()]
-    subjects = [(s, s.branch.name) for s in Subject.query.all()]  # Fetch subjects with branch names
+    page = paginate_from_request(Subject.query.options(joinedload(Subject.branch)), Subject.id)
+    subjects = [(s, s.branch.name) for s in page]  # Branch names come from the same joined query
 
     if form.validate_on_submit():
         if request.args.get("subject_id"):  # Check if updating
@@ -281,12 +357,18 @@ def manage_subject():
         flash("Subject saved successfully!", "success")
         return redirect(url_for("admin.manage_subject"))
 
-    return render_template("admin/manage_subject.html", form=form, subjects=subjects)
+    # Handle deleting a subject (and its chapters, quizzes and scores, see bulk_ops.py)
+    delete_subject_id = request.args.get("delete_subject_id", "")
+    if delete_subject_id.isdigit():
+        delete_items("subject", [int(delete_subject_id)])
+        flash("Subject deleted successfully!", "success")
+        return redirect(url_for("admin.manage_subject"))
+
+    return render_template("admin/manage_subject.html", form=form, subjects=subjects, page=page)
 
 
 # ⪼ Manage Chapters_________________________________________________
 from forms import ChapterForm  # Import the form
-from sqlalchemy.orm import joinedload
 
 @admin_bp.route("/manage_chapter", methods=['GET', 'POST'])
 @login_required
@@ -294,8 +376,8 @@ def manage_chapter():
     form = ChapterForm()
     form.subject_id.choices = [(s.id, s.name) for s in Subject.query.all()]  # Populate dropdown with subjects
 
-    # Fetch all chapters with their subjects
-    chapters = Chapter.query.options(joinedload(Chapter.subject)).all()
+    # Fetch one page of chapters with their subjects
+    page = paginate_from_request(Chapter.query.options(joinedload(Chapter.subject)), Chapter.id)
 
     if form.validate_on_submit():
         chapter_id = request.form.get("chapter_id")  # Get chapter_id from form
@@ -313,15 +395,14 @@ def manage_chapter():
         db.session.commit()
         return redirect(url_for("admin.manage_chapter"))  # Ensure blueprint name is used
 
-    return render_template("admin/manage_chapter.html", form=form, chapters=chapters)
+    return render_template("admin/manage_chapter.html", form=form, chapters=page.items, page=page)
 
 
 @admin_bp.route("/delete_chapter/<int:chapter_id>", methods=['POST'])
 @login_required
 def delete_chapter(chapter_id):
     chapter = Chapter.query.get_or_404(chapter_id)
-    db.session.delete(chapter)
-    db.session.commit()
+    delete_items("chapter", [chapter.id])  # Takes its quizzes, questions and scores with it
     flash("Chapter deleted successfully!", "success")
     return redirect(url_for("admin.manage_chapter"))  # Ensure correct blueprint reference
 
@@ -335,7 +416,7 @@ from forms import UserForm
 def manage_user():
     form = UserForm()
     form.branch_id.choices = [(b.id, b.name) for b in Branch.query.all()]  # Populate branch dropdown
-    users = User.query.all()
+    page = paginate_from_request(User.query.options(joinedload(User.branch)), User.id)  # Template shows user.branch.name
 
     # If we are editing a user
     user_id = request.args.get('user_id')  # Get the user_id for editing
@@ -370,6 +451,7 @@ def manage_user():
                 if password:  # If a new password is provided, update it
                     user.set_password(password)
                 db.session.commit()
+                invalidate_identity(user.id)
                 flash("User details updated successfully!", "success")
         else:  # If adding a new user
             if password:
@@ -388,13 +470,37 @@ def manage_user():
         if user and user.id != 1:  # Ensure admin user (ID=1) is not deleted
             db.session.delete(user)
             db.session.commit()
+            invalidate_identity(delete_user_id)
             flash(f"User {user.username} deleted successfully!", "success")
         else:
             flash("Admin user cannot be deleted!", "error")
 
         return redirect(url_for("admin.manage_user"))
 
-    return render_template("admin/manage_user.html", form=form, users=users)
+    return render_template("admin/manage_user.html", form=form, users=page.items, page=page)
+
+
+# ⪼ Bulk user import (CSV upload)_________________________________
+from user_import import import_users
+
+@admin_bp.route("/import_users", methods=['POST'])
+@login_required
+@admin_only
+def import_users_upload():
+    upload = request.files.get("file")
+    if not upload or not upload.filename:
+        flash("Choose a CSV file to import.", "error")
+        return redirect(url_for("admin.manage_user"))
+
+    stream = io.TextIOWrapper(upload.stream, encoding="utf-8", newline="")
+    report = import_users(stream)
+
+    flash(f"Imported {report['imported']} users ({report['users_per_second']}/s), "
+          f"rejected {report['rejected']}, {report['conflicts']} already existed.",
+          "success" if report["imported"] else "error")
+    for error in report["errors"][:10]:
+        flash(error, "error")
+    return redirect(url_for("admin.manage_user"))
 
 
 # ⪼ Manage Quizzes_________________________________________________
@@ -408,15 +514,16 @@ def manage_quiz():
     chapters = Chapter.query.all()
     form.chapter_id.choices = [(c.id, c.name) for c in chapters]
 
-    quizzes = db.session.query(
+    page = paginate_from_request(db.session.query(
     Quiz.id, Quiz.name, Quiz.nos, Quiz.time,
     Chapter.name.label("chapter_name"),
-    Quiz.created_at  # Add this field
-).join(Chapter, Quiz.chapter_id == Chapter.id).all()
+    Quiz.created_at,  # Add this field
+    Quiz.version  # Row fragments are cached per quiz version
+).join(Chapter, Quiz.chapter_id == Chapter.id), Quiz.id)
 
 
     if request.method == "POST":
-        print(request.form)  # Debugging
+        log.debug("manage_quiz form: %s", request.form)
 
         # ADD QUIZ
         if "add" in request.form:
@@ -450,6 +557,7 @@ def manage_quiz():
                 quiz.nos = int(request.form.get(f"nos_{quiz_id}"))
                 quiz.time = int(request.form.get(f"time_{quiz_id}"))
                 db.session.commit()
+                invalidate_answer_key(quiz.id)
                 flash("Quiz updated successfully!", "success")
 
         # DELETE QUIZ
@@ -457,14 +565,85 @@ def manage_quiz():
             quiz_id = request.form.get("delete")
             quiz = Quiz.query.get(quiz_id)
             if quiz:
-                db.session.delete(quiz)
-                db.session.commit()
+                delete_items("quiz", [quiz.id])  # Questions, scores and attempts go with it
                 flash("Quiz deleted successfully!", "success")
 
         return redirect(url_for("admin.manage_quiz"))
 
-    return render_template("admin/manage_quiz.html", form=form, quizzes=quizzes, chapters=chapters)
+    return render_template("admin/manage_quiz.html", form=form, quizzes=page.items, page=page, chapters=chapters)
+
+
 
+# ⪼ Bulk operations (multi-select forms on the manage pages)__________
+from bulk_ops import delete_items, delete_questions, move_chapters, move_quizzes, set_question_marks, set_quiz_time
+
+BULK_PAGES = {"branch": "admin.manage_branch", "subject": "admin.manage_subject", "chapter": "admin.manage_chapter",
+              "quiz": "admin.manage_quiz", "question": "admin.manage_question"}
+
+
+def _selected_ids():
+    return [int(i) for i in request.form.getlist("ids") if i.isdigit()]
+
+
+def _bulk_summary(result):
+    return ", ".join(f"{count} {name.replace('_', ' ')}" for name, count in result.items() if name != "seconds")
+
+
+@admin_bp.route("/bulk/delete", methods=["POST"])
+@login_required
+@admin_only
+def bulk_delete():
+    level, ids = request.form.get("level"), _selected_ids()
+    if level not in BULK_PAGES:
+        abort(400)
+    if not ids:
+        flash("Select at least one row.", "error")
+        return redirect(url_for(BULK_PAGES[level]))
+    try:
+        result = delete_items(level, ids)
+        flash(f"Deleted {_bulk_summary(result)} ({result['seconds']}s).", "success")
+    except ValueError as e:
+        db.session.rollback()
+        flash(str(e), "error")
+    return redirect(url_for(BULK_PAGES[level]))
+
+
+@admin_bp.route("/bulk/move", methods=["POST"])
+@login_required
+@admin_only
+def bulk_move():
+    level, ids, target = request.form.get("level"), _selected_ids(), request.form.get("target", "")
+    if level not in ("chapter", "quiz"):
+        abort(400)
+    if not ids or not target.isdigit():
+        flash("Select rows and where to move them.", "error")
+        return redirect(url_for(BULK_PAGES[level]))
+    try:
+        result = move_chapters(ids, int(target)) if level == "chapter" else move_quizzes(ids, int(target))
+        flash(f"Moved {_bulk_summary(result)} ({result['seconds']}s).", "success")
+    except ValueError as e:
+        db.session.rollback()
+        flash(str(e), "error")
+    return redirect(url_for(BULK_PAGES[level]))
+
+
+@admin_bp.route("/bulk/edit", methods=["POST"])
+@login_required
+@admin_only
+def bulk_edit():
+    level, ids, value = request.form.get("level"), _selected_ids(), request.form.get("value", "")
+    if level not in ("quiz", "question"):
+        abort(400)
+    if not ids or not value.isdigit() or int(value) < 1:
+        flash("Select rows and enter a positive number.", "error")
+        return redirect(url_for(BULK_PAGES[level]))
+    if level == "quiz":
+        result = set_quiz_time(ids, int(value))
+        flash(f"Set the time of {result['quizzes']} quizzes to {value}s.", "success")
+    else:
+        result = set_question_marks(ids, int(value))
+        flash(f"Set {result['questions']} questions to {value} marks. Regrade to update past scores.", "success")
+    return redirect(url_for(BULK_PAGES[level]))
 
 
 # ⪼ Manage Questions_________________________________________________
@@ -485,8 +664,8 @@ def manage_question():
                         .all()
     form.quiz_id.choices = [(quiz.quiz_id, f"{quiz.quiz_name} - {quiz.subject_name}") for quiz in quizzes]
 
-    # Fetch all questions with related data
-    questions = db.session.query(
+    # Fetch one page of questions with related data
+    page = paginate_from_request(db.session.query(
         Question.id,
         Question.question_text,
         Question.option1,
@@ -495,8 +674,19 @@ def manage_question():
         Question.option4,
         Question.ans.label("correct_option"),
         Question.marks,
-        Quiz.name.label("quiz_name")
-    ).join(Quiz, Question.quiz_id == Quiz.id).all()
+        Quiz.name.label("quiz_name"),
+        Question.quiz_id,
+        Quiz.version.label("quiz_version"),  # Row fragments are cached per (quiz, quiz version)
+        ItemStats.attempts.label("stat_attempts"),  # Cached item analysis (NULL until analyzed)
+        ItemStats.difficulty,
+        ItemStats.discrimination,
+        ItemStats.blank,
+        ItemStats.picked1,
+        ItemStats.picked2,
+        ItemStats.picked3,
+        ItemStats.picked4
+    ).join(Quiz, Question.quiz_id == Quiz.id)
+     .outerjoin(ItemStats, ItemStats.question_id == Question.id), Question.id)
 
     if request.method == "POST":
         action = request.form.get("action")  # 'add', 'edit', or 'delete'
@@ -525,6 +715,7 @@ def manage_question():
                 try:
                     db.session.add(new_question)
                     db.session.commit()
+                    invalidate_answer_key(new_question.quiz_id)
                     flash("Question added successfully!", "success")
                 except Exception as e:
                     db.session.rollback()
@@ -533,6 +724,7 @@ def manage_question():
             question_id = request.form.get("edit_question_id")
             question = Question.query.get(question_id)
             if question:
+                old_quiz_id = question.quiz_id  # The question may move to another quiz
                 question.quiz_id = int(request.form.get("quiz_id"))
                 question.question_text = request.form.get("question_text").strip()
                 question.option1 = request.form.get("option1").strip()
@@ -543,6 +735,7 @@ def manage_question():
                 question.marks = int(request.form.get("marks"))
                 try:
                     db.session.commit()
+                    invalidate_answer_key(old_quiz_id, question.quiz_id)
                     flash("Question updated successfully!", "success")
                 except Exception as e:
                     db.session.rollback()
@@ -552,14 +745,52 @@ def manage_question():
             question = Question.query.get(question_id)
             if question:
                 try:
-                    db.session.delete(question)
-                    db.session.commit()
+                    delete_questions([question.id])  # Also drops its stored responses
                     flash("Question deleted successfully!", "success")
                 except Exception as e:
                     db.session.rollback()
                     flash(f"Failed to delete question! Error: {e}", "error")
+        elif action == "regrade":
+            # Recompute every stored attempt of the quiz against its current answers
+            quiz_id = request.form.get("quiz_id")
+            if quiz_id:
+                result = regrade_quiz(int(quiz_id))
+                flash(f"Regraded {result['regradable']} attempts, {result['changed']} scores changed "
+                      f"({result['seconds']}s).", "success")
+        elif action == "analyze":
+            # Recompute difficulty, discrimination and option picks from the stored responses
+            quiz_id = request.form.get("quiz_id")
+            if quiz_id:
+                result = analyze_quizzes([int(quiz_id)])
+                reliability = db.session.get(QuizReliability, int(quiz_id))
+                alpha = "n/a" if reliability is None or reliability.alpha is None else f"{reliability.alpha:.2f}"
+                flash(f"Analyzed {result['questions']} questions over {result['responses']} responses "
+                      f"(Cronbach's alpha {alpha}, {result['seconds']}s).", "success")
         return redirect(url_for("admin.manage_question"))
-    return render_template("admin/manage_question.html", form=form, questions=questions, quizzes=quizzes)
+    return render_template("admin/manage_question.html", form=form, questions=page.items, page=page, quizzes=quizzes)
+
+
+# ⪼ Bulk question import (CSV / JSONL upload)_____________________
+from question_import import import_questions, detect_format
+
+@admin_bp.route("/import_questions", methods=['POST'])
+@login_required
+@admin_only
+def import_questions_upload():
+    upload = request.files.get("file")
+    if not upload or not upload.filename:
+        flash("Choose a CSV or JSONL file to import.", "error")
+        return redirect(url_for("admin.manage_question"))
+
+    # Decode the upload as a stream; rows are read and inserted chunk by chunk
+    stream = io.TextIOWrapper(upload.stream, encoding="utf-8", newline="")
+    report = import_questions(stream, detect_format(upload.filename))
+
+    flash(f"Imported {report['imported']} questions, rejected {report['rejected']} ({report['seconds']}s).",
+          "success" if report["imported"] else "error")
+    for error in report["errors"][:10]:
+        flash(error, "error")
+    return redirect(url_for("admin.manage_question"))
 
 
 # ⪼ admin logout_________________________________________________
@@ -576,7 +807,7 @@ def logout():
 @routes_bp.route("/start_quiz/<int:quiz_id>")
 @login_required
 def start_quiz(quiz_id):
-    quiz = Quiz.query.get_or_404(quiz_id)
+    quiz = surge_quiz(quiz_id) or Quiz.query.get_or_404(quiz_id)  # Served from memory while the quiz is surging
     return render_template("user/start_quiz.html", quiz=quiz)
 
 
@@ -585,34 +816,102 @@ def start_quiz(quiz_id):
 @routes_bp.route("/quiz/<int:quiz_id>", methods=["GET", "POST"])
 @login_required
 def quiz(quiz_id):
-    quiz = Quiz.query.get_or_404(quiz_id)
-    questions = Question.query.filter_by(quiz_id=quiz.id).all()
+    quiz = surge_quiz(quiz_id) or Quiz.query.get_or_404(quiz_id)
+
+    if request.method == "POST":
+        attempt_id = request.form.get("attempt_id", "")
+        attempt = _own_attempt(int(attempt_id)) if attempt_id.isdigit() else open_attempt(current_user.id, quiz.id, quiz.nos)
+        if attempt.quiz_id != quiz.id:
+            abort(404)
 
-    # Debugging: Check if questions exist
-    if not questions:
-        print(f"❌ No questions found for Quiz ID: {quiz_id}")
+        # Grade against the compiled answer key of the attempt's drawn questions instead of reloading them,
+        # then store the score and the per-question selections (kept so the attempt can be regraded later).
+        # With SCORE_WRITE_BEHIND this is queued and committed in a batch by the score writer.
+        score = submit_attempt(current_app._get_current_object(), attempt, quiz.subject_id, form=request.form)
 
-    for question in questions:
-        print(f"✅ Question: {question.question_text}, Options: [{question.option1}, {question.option2}, {question.option3}, {question.option4}]")
+        log.info("Score recorded: user=%s quiz=%s score=%s", current_user.id, quiz.id, score)
 
-    if request.method == "POST":
-        score = 0
+        return redirect(url_for("routes.end_quiz", quiz_id=quiz.id, score=score))
 
-        for question in questions:
-            selected_option = request.form.get(f"question_{question.id}")
-            if selected_option and int(selected_option) == question.ans:
-                score += question.marks
+    # In surge mode, starts above the admission rate get a "please wait" page instead of an attempt
+    waiting = admit(quiz.id)
+    if waiting is not None:
+        return waiting
 
-        # Store the score in the database
-        new_score = Score(user_id=current_user.id, quiz_id=quiz.id, score=score)
-        db.session.add(new_score)
-        db.session.commit()
+    # Draws Quiz.nos questions from the bank for a new attempt; a reload resumes the same attempt and set
+    attempt = open_attempt(current_user.id, quiz.id, quiz.nos)
+    drawn = drawn_question_ids(attempt)
 
-        print(f"✅ Score Recorded: {score}")
+    def load_questions():
+        # Only called when the rendered question list for this quiz version isn't in the fragment cache
+        questions = surge_questions(quiz.id, drawn)  # Pre-warmed rows while the quiz is surging
+        if questions is None:
+            query = Question.query.filter_by(quiz_id=quiz.id) if drawn is None else Question.query.filter(Question.id.in_(drawn))
+            questions = query.order_by(Question.id).all()
 
-        return redirect(url_for("routes.end_quiz", quiz_id=quiz.id, score=score))
+        # Debugging: Check if questions exist
+        if not questions:
+            log.warning("No questions found for quiz %s", quiz_id)
+
+        if log.isEnabledFor(logging.DEBUG):
+            for question in questions:
+                log.debug("Question %s: %s, options: [%s, %s, %s, %s]", question.id, question.question_text,
+                          question.option1, question.option2, question.option3, question.option4)
+        return questions
+
+    return render_template("user/quiz.html", quiz=quiz, attempt=attempt, load_questions=load_questions)
 
-    return render_template("user/quiz.html", quiz=quiz, questions=questions)
+
+# ⪼ Paged Quiz Attempt (questions fetched in chunks, answers autosaved)
+def _own_attempt(attempt_id):
+    attempt = db.session.get(QuizAttempt, attempt_id)
+    if attempt is None or attempt.user_id != current_user.id:
+        abort(404)
+    return attempt
+
+
+@routes_bp.route("/quiz/<int:quiz_id>/paged")
+@login_required
+def quiz_paged(quiz_id):
+    quiz = surge_quiz(quiz_id) or Quiz.query.get_or_404(quiz_id)
+    waiting = admit(quiz.id)
+    if waiting is not None:
+        return waiting
+    attempt = open_attempt(current_user.id, quiz.id, quiz.nos)  # Resumes an unfinished attempt after a reload
+    return render_template("user/quiz_paged.html", quiz=quiz, attempt=attempt,
+                           time_left=seconds_left(attempt, quiz.time))
+
+
+@routes_bp.route("/quiz/attempt/<int:attempt_id>/questions")
+@login_required
+def attempt_questions(attempt_id):
+    attempt = _own_attempt(attempt_id)
+    after = request.args.get("after", "")
+    questions, next_cursor = question_chunk(attempt, after=int(after) if after.isdigit() else None,
+                                            size=current_app.config["QUIZ_CHUNK_SIZE"])
+    return jsonify(questions=questions, next=next_cursor)
+
+
+@routes_bp.route("/quiz/attempt/<int:attempt_id>/answers", methods=["POST"])
+@login_required
+def attempt_answers(attempt_id):
+    attempt = _own_attempt(attempt_id)
+    if attempt.submitted_at is not None:
+        return jsonify(error="This attempt has already been submitted."), 409
+    answers = (request.get_json(silent=True) or {}).get("answers")
+    if not isinstance(answers, dict):
+        return jsonify(error="Expected {\"answers\": {question_id: option}}."), 400
+    return jsonify(saved=save_answers(attempt, answers))
+
+
+@routes_bp.route("/quiz/attempt/<int:attempt_id>/submit", methods=["POST"])
+@login_required
+def attempt_submit(attempt_id):
+    attempt = _own_attempt(attempt_id)
+    quiz = surge_quiz(attempt.quiz_id) or Quiz.query.get_or_404(attempt.quiz_id)
+    score = submit_attempt(current_app._get_current_object(), attempt, quiz.subject_id)
+    log.info("Paged attempt %s submitted: user=%s quiz=%s score=%s", attempt.id, current_user.id, quiz.id, score)
+    return redirect(url_for("routes.end_quiz", quiz_id=quiz.id, score=score))
 
 
 # ⪼ End Quiz Page
@@ -620,9 +919,15 @@ def quiz(quiz_id):
 @login_required
 def end_quiz(quiz_id, score):
     quiz = Quiz.query.get_or_404(quiz_id)  # Ensure quiz exists
-    total_questions = len(quiz.questions)  # This is for lists
-
-    return render_template("user/end_quiz.html", quiz_id=quiz_id, score=score or 0, total_questions=total_questions)
+    total_questions = db.session.query(func.count(Question.id)).filter(Question.quiz_id == quiz_id).scalar()
+    if quiz.nos:
+        total_questions = min(total_questions, quiz.nos)  # Attempts are drawn nos questions from the bank
+
+    # Ranks come from the in-memory rank index; the top list is a short index scan
+    return render_template("user/end_quiz.html", quiz_id=quiz_id, score=score or 0, total_questions=total_questions,
+                           quiz_rank=rank(QUIZ, quiz_id, current_user.id),
+                           branch_rank=rank(BRANCH, current_user.branch_id, current_user.id),
+                           leaders=top(QUIZ, quiz_id, k=5))
 
 
 
@@ -0,0 +1,178 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+from sqlalchemy import insert
+from models import db, Score, Response
+from user_stats import record_attempts
+from leaderboards import record_best_scores
+
+log = logging.getLogger(__name__)
+
+# ⪼ Graded quiz attempts
+# selections: [(question_id, selected or None), ...] from answer_keys.selected_options
+Attempt = namedtuple("Attempt", "user_id quiz_id subject_id score selections")
+
+
+def write_attempts(attempts):
+    # Inserts the Score rows, their per-question responses and the stats updates in the caller's transaction
+    score_ids = db.session.execute(
+        insert(Score).returning(Score.id, sort_by_parameter_order=True),
+        [{"user_id": a.user_id, "quiz_id": a.quiz_id, "score": a.score} for a in attempts]
+    ).scalars().all()
+
+    responses = [
+        {"score_id": score_id, "question_id": qid, "selected": selected}
+        for score_id, attempt in zip(score_ids, attempts)
+        for qid, selected in attempt.selections
+    ]
+    if responses:
+        db.session.execute(insert(Response), responses)
+
+    record_attempts([(a.user_id, a.subject_id, a.score) for a in attempts])
+    record_best_scores([(a.user_id, a.quiz_id, a.subject_id, a.score) for a in attempts])
+    return score_ids
+
+
+# ⪼ Write-behind queue
+# With SCORE_WRITE_BEHIND on, requests hand their graded attempt to a bounded queue and a background
+# thread commits them in batches (every SCORE_BATCH_MS or SCORE_BATCH_ROWS rows), so a burst of
+# submissions costs one fsync per batch instead of one per student.
+
+class ScoreWriter:
+    def __init__(self, app):
+        self.app = app
+        config = app.config
+        self.batch_seconds = config["SCORE_BATCH_MS"] / 1000
+        self.batch_rows = config["SCORE_BATCH_ROWS"]
+        self.enqueue_timeout = config["SCORE_ENQUEUE_TIMEOUT"]
+        self.queue = queue.Queue(maxsize=config["SCORE_QUEUE_SIZE"])
+        self.stats = {"enqueued": 0, "written": 0, "batches": 0, "last_batch": 0, "max_batch": 0,
+                      "sync_fallbacks": 0, "failed": 0}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="score-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, attempt):
+        # Backpressure: wait up to SCORE_ENQUEUE_TIMEOUT for room, then write synchronously instead of dropping
+        if self._stopping.is_set():
+            write_attempts([attempt])
+            db.session.commit()
+            return
+        try:
+            self.queue.put(attempt, timeout=self.enqueue_timeout)
+        except queue.Full:
+            with self._lock:
+                self.stats["sync_fallbacks"] += 1
+            write_attempts([attempt])
+            db.session.commit()
+            return
+        with self._lock:
+            self.stats["enqueued"] += 1
+
+    def _next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.batch_seconds
+        while len(batch) < self.batch_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            stopping = None in batch  # Shutdown sentinel
+            batch = [attempt for attempt in batch if attempt is not None]
+            if batch:
+                self._write(batch)
+            if stopping:
+                return
+
+    def _write(self, batch):
+        with self.app.app_context():
+            try:
+                write_attempts(batch)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                log.exception("Score batch of %d failed, retrying one attempt at a time", len(batch))
+                self._write_each(batch)
+                return
+            finally:
+                db.session.remove()
+        with self._lock:
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+            self.stats["last_batch"] = len(batch)
+            self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+
+    def _write_each(self, batch):
+        for attempt in batch:
+            try:
+                write_attempts([attempt])
+                db.session.commit()
+                with self._lock:
+                    self.stats["written"] += 1
+            except Exception:
+                db.session.rollback()
+                log.exception("Dropping score for user %s on quiz %s", attempt.user_id, attempt.quiz_id)
+                with self._lock:
+                    self.stats["failed"] += 1
+        db.session.remove()
+
+    def flush_and_stop(self):
+        # Durability on shutdown: everything queued before this call is committed before it returns
+        if not self._stopping.is_set():
+            self._stopping.set()
+            self.queue.put(None)
+            self._thread.join()
+            # Anything that slipped in behind the sentinel
+            leftovers = []
+            while not self.queue.empty():
+                attempt = self.queue.get_nowait()
+                if attempt is not None:
+                    leftovers.append(attempt)
+            if leftovers:
+                self._write(leftovers)
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats["queue_depth"] = self.queue.qsize()
+        stats["avg_batch"] = round(stats["written"] / stats["batches"], 1) if stats["batches"] else 0
+        return stats
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_score_writer(app):
+    # Started lazily on the first submission, so forked workers each get their own thread
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ScoreWriter(app)
+                atexit.register(_writer.flush_and_stop)
+    return _writer
+
+
+def record_score(app, attempt):
+    if app.config["SCORE_WRITE_BEHIND"]:
+        get_score_writer(app).submit(attempt)
+    else:
+        write_attempts([attempt])
+        db.session.commit()
+
+
+def score_writer_stats():
+    return _writer.snapshot() if _writer is not None else None
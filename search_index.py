@@ -0,0 +1,87 @@
+import re
+from sqlalchemy import text
+from models import db, User, Subject, Chapter, Quiz, Question
+
+# ⪼ Full-text search (SQLite FTS5)
+# One external-content FTS5 table per searchable model, keyed by the model's id and kept
+# in sync by triggers, so bulk/raw SQL writes are indexed too. Queries match word prefixes
+# ("alg" finds "Algebra") and come back ranked by bm25.
+
+SEARCH_TABLES = {
+    User: ("user_fts", "user", ("name", "email", "username")),
+    Subject: ("subject_fts", "subject", ("name",)),
+    Chapter: ("chapter_fts", "chapter", ("name",)),
+    Quiz: ("quiz_fts", "quiz", ("name",)),
+    Question: ("question_fts", "question", ("question_text",)),
+}
+
+_enabled = False
+
+
+def _ddl(fts, table, columns):
+    cols = ", ".join(columns)
+    new_vals = ", ".join(f"new.{c}" for c in columns)
+    old_vals = ", ".join(f"old.{c}" for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', content_rowid='id', prefix='2 3')",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON "{table}" BEGIN
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_vals});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON "{table}" BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_vals});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON "{table}" BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_vals});
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_vals});
+        END""",
+    ]
+
+
+def setup_search_index(app):
+    # Creates the FTS tables and triggers if missing; a freshly created index is filled from the base tables
+    global _enabled
+    with app.app_context():
+        if db.engine.dialect.name != "sqlite":
+            return  # Other databases keep the ILIKE fallback
+        with db.engine.begin() as conn:
+            existing = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+            for fts, table, columns in SEARCH_TABLES.values():
+                for statement in _ddl(fts, table, columns):
+                    conn.execute(text(statement))
+                if fts not in existing:
+                    conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+        _enabled = True
+
+
+def rebuild_search_index():
+    for fts, _, _ in SEARCH_TABLES.values():
+        db.session.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+    db.session.commit()
+
+
+def _match_expression(query):
+    # Every word must match as a prefix; words are quoted so FTS5 operators in user input are inert
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search(model, query, limit=50):
+    fts, _, columns = SEARCH_TABLES[model]
+
+    if not _enabled:
+        pattern = f"%{query}%"
+        return model.query.filter(db.or_(*(getattr(model, c).ilike(pattern) for c in columns))).limit(limit).all()
+
+    match = _match_expression(query)
+    if not match:
+        return []
+    ids = [row[0] for row in db.session.execute(
+        text(f"SELECT rowid FROM {fts} WHERE {fts} MATCH :match ORDER BY rank LIMIT :limit"),
+        {"match": match, "limit": limit}
+    )]
+    if not ids:
+        return []
+
+    # Load the matched rows by primary key and keep the FTS ranking order
+    items = {item.id: item for item in model.query.filter(model.id.in_(ids))}
+    return [items[i] for i in ids if i in items]
@@ -0,0 +1,39 @@
+import logging
+from flask import current_app, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session, raiseload
+
+# ⪼ Strict loading guard
+# Routes are expected to say up front what they load (joinedload/selectinload options or a COUNT
+# query), so each page runs a fixed number of statements. Unplanned lazy loads are caught here:
+#   raise - every ORM select gets raiseload("*", sql_only=True); touching an unloaded relationship
+#           that would need SQL raises InvalidRequestError (default under DEBUG/TESTING)
+#   log   - lazy loads still run but are logged as warnings (default otherwise)
+#   off   - plain SQLAlchemy behaviour
+
+log = logging.getLogger(__name__)
+
+LOADING_MODES = ("raise", "log", "off")
+
+
+def loading_mode():
+    if not has_app_context():
+        return "off"
+    mode = current_app.config.get("STRICT_LOADING")
+    if not mode:
+        mode = "raise" if current_app.debug or current_app.testing else "log"
+    return mode
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _guard_lazy_loads(execute_state):
+    if not execute_state.is_select:
+        return
+    mode = loading_mode()
+    if mode == "raise":
+        # Explicit loader options on the statement still win over the wildcard
+        execute_state.statement = execute_state.statement.options(raiseload("*", sql_only=True))
+    elif mode == "log" and execute_state.lazy_loaded_from is not None:
+        log.warning("Lazy load of %s from %s during %s", execute_state.bind_mapper.class_.__name__,
+                    execute_state.lazy_loaded_from.class_.__name__,
+                    request.endpoint if has_request_context() else "background work")
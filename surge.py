@@ -0,0 +1,248 @@
+import math
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from threading import Lock
+from flask import current_app, render_template, session
+from sqlalchemy import delete
+from models import db, Quiz, Question, QuizSurge
+from answer_keys import get_answer_key, answer_key_generation
+
+# ⪼ Exam-start surge mode
+# When a whole branch opens a quiz at once, every request would hit SQLite cold. An admin marks the
+# quiz as opening soon (a quiz_surge row with the end of the window, polled by every worker every
+# SURGE_POLL_SECONDS) and each worker pre-warms what the quiz pages read on first use: the quiz row,
+# its question payload and its answer key, so /start_quiz and /quiz serve them from memory. The poll
+# also reads Quiz.version, so an edit made through any worker re-warms every worker's snapshot.
+#
+# Quiz starts (the GETs that open an attempt) then go through a token bucket: SURGE_RATE starts per
+# second with bursts of SURGE_BURST, split evenly over the SURGE_WORKERS processes. Excess requests
+# aren't turned away; each gets a reserved slot (kept in the signed session cookie, so any worker can
+# honour it) and a "please wait" page that retries when the slot comes up, so the queue drains in
+# arrival order at the rate SQLite can absorb.
+
+QuizMeta = namedtuple("QuizMeta", "id name nos time version subject_id chapter_id")
+QuestionRow = namedtuple("QuestionRow", "id question_text option1 option2 option3 option4")
+
+
+class Surge:
+    def __init__(self, meta, questions, until, generation):
+        self.meta = meta
+        self.questions = questions  # question_id -> QuestionRow
+        self.until = until  # wall-clock end of the surge window
+        self.generation = generation  # answer-key generation at warm time; an edit in this process re-warms
+        self.stats = {"admitted": 0, "queued": 0, "admitted_from_queue": 0}
+
+
+class AdmissionController:
+    # Token bucket in its GCRA form: tat is the theoretical arrival time of the next request at the
+    # sustained rate. A request conforms if it's no earlier than tat - burst * interval; one that doesn't
+    # reserves the next slot instead, so reservations form an implicit FIFO queue.
+    def __init__(self, rate, burst):
+        self.interval = 1.0 / rate
+        self.tolerance = burst * self.interval
+        self.tat = 0.0
+        self._lock = Lock()
+        self.stats = {"admitted": 0, "queued": 0, "admitted_from_queue": 0, "turned_away": 0, "max_wait": 0.0}
+
+    def reserve(self, now, max_wait):
+        # Returns the time the caller may start: <= now means admitted right away
+        with self._lock:
+            tat = max(self.tat, now)
+            start = tat + self.interval - self.tolerance
+            if start - now > max_wait:
+                self.stats["turned_away"] += 1
+                return None  # Queue is full: don't hold a slot, ask to come back later
+            self.tat = tat + self.interval
+            if start <= now:
+                self.stats["admitted"] += 1
+            else:
+                self.stats["queued"] += 1
+                self.stats["max_wait"] = max(self.stats["max_wait"], round(start - now, 3))
+            return start
+
+    def redeem(self):
+        with self._lock:
+            self.stats["admitted_from_queue"] += 1
+
+    def queue_length(self, now):
+        # Reserved slots not yet reached (past the burst allowance)
+        with self._lock:
+            return max(0, math.ceil((self.tat - now - self.tolerance) / self.interval))
+
+    def snapshot(self, now):
+        with self._lock:
+            stats = dict(self.stats)
+        return dict(stats, queue_length=self.queue_length(now), wait_seconds=round(max(0.0, self.tat - self.tolerance - now), 3))
+
+
+_surges = {}  # quiz_id -> Surge warmed in this process
+_marks = {"quizzes": {}, "checked": 0.0}  # quiz_id -> (epoch end of its window, Quiz.version), as last polled
+_controller = None
+_lock = Lock()
+
+
+def _epoch(value):
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _utc(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None)  # SQLite hands DateTimes back naive
+
+
+def _load(quiz_id, until):
+    generation = answer_key_generation()
+    meta = db.session.query(Quiz.id, Quiz.name, Quiz.nos, Quiz.time, Quiz.version, Quiz.subject_id, Quiz.chapter_id) \
+        .filter(Quiz.id == quiz_id).first()
+    if meta is None:
+        raise ValueError(f"Quiz {quiz_id} does not exist")
+    questions = {row.id: QuestionRow(*row) for row in db.session.query(
+        Question.id, Question.question_text, Question.option1, Question.option2, Question.option3, Question.option4
+    ).filter(Question.quiz_id == quiz_id).order_by(Question.id)}
+    get_answer_key(quiz_id)  # Compiled and kept by answer_keys.py
+    return Surge(QuizMeta(*meta), questions, until, generation)
+
+
+def _marked():
+    # {quiz_id: (until, version)} of the surges in quiz_surge, re-read at most every SURGE_POLL_SECONDS per process
+    now = time.time()
+    if now - _marks["checked"] >= current_app.config["SURGE_POLL_SECONDS"]:
+        rows = db.session.query(QuizSurge.quiz_id, QuizSurge.until, Quiz.version) \
+            .join(Quiz, Quiz.id == QuizSurge.quiz_id).filter(QuizSurge.until > _utc(now)).all()
+        with _lock:
+            _marks["quizzes"] = {quiz_id: (_epoch(until), version) for quiz_id, until, version in rows}
+            _marks["checked"] = now
+    return _marks["quizzes"]
+
+
+def _get_controller():
+    # Each worker admits its share of the rate, so the whole deployment stays near SURGE_RATE
+    global _controller
+    with _lock:
+        if _controller is None:
+            config = current_app.config
+            workers = max(1, config["SURGE_WORKERS"])
+            _controller = AdmissionController(config["SURGE_RATE"] / workers, max(1, config["SURGE_BURST"] // workers))
+        return _controller
+
+
+def start_surge(quiz_id, minutes=None):
+    until = time.time() + 60 * (minutes or current_app.config["SURGE_WINDOW_MINUTES"])
+    surge = _load(quiz_id, until)
+    db.session.merge(QuizSurge(quiz_id=quiz_id, until=_utc(until)))  # Other workers see it at their next poll
+    db.session.commit()
+    with _lock:
+        _surges[quiz_id] = surge
+        _marks["quizzes"][quiz_id] = (until, surge.meta.version)
+    return surge
+
+
+def end_surge(quiz_id):
+    db.session.execute(delete(QuizSurge).where(QuizSurge.quiz_id == quiz_id))
+    db.session.commit()
+    forget_surges([quiz_id])
+
+
+def forget_surges(quiz_ids):
+    # Drops this process's snapshots; other workers drop theirs once quiz_surge no longer lists the quiz
+    with _lock:
+        for quiz_id in quiz_ids:
+            _surges.pop(quiz_id, None)
+            _marks["quizzes"].pop(quiz_id, None)
+
+
+def _active(quiz_id):
+    # The warmed snapshot of a surging quiz, loaded into this process on first use
+    until, version = _marked().get(quiz_id, (None, None))
+    if until is None or time.time() > until:
+        if quiz_id in _surges:
+            forget_surges([quiz_id])
+        return None
+    surge = _surges.get(quiz_id)
+    # Stale if edited here (generation) or through another worker (a newer version at the last poll)
+    if surge is None or surge.generation != answer_key_generation() or surge.meta.version < version:
+        try:
+            surge = _load(quiz_id, until)  # Not warmed here yet, or a quiz or question was edited since
+        except ValueError:
+            forget_surges([quiz_id])  # The quiz was deleted: callers fall back to their usual 404
+            return None
+        with _lock:
+            _surges[quiz_id] = surge
+    surge.until = until  # An admin may have restarted the window
+    return surge
+
+
+def surge_quiz(quiz_id):
+    # Warmed quiz metadata (same attributes the templates read from Quiz), or None outside a surge
+    surge = _active(quiz_id)
+    return surge.meta if surge else None
+
+
+def surge_questions(quiz_id, question_ids=None):
+    # Warmed question rows for the quiz, or just the given ones in id order; None outside a surge
+    surge = _active(quiz_id)
+    if surge is None:
+        return None
+    if question_ids is None:
+        return list(surge.questions.values())
+    return [surge.questions[qid] for qid in sorted(question_ids) if qid in surge.questions]
+
+
+def _count(surge, stat):
+    with _lock:
+        surge.stats[stat] += 1
+
+
+def admit(quiz_id):
+    # None when the request may open its attempt now, otherwise the "please wait" response
+    surge = _active(quiz_id)
+    if surge is None:
+        return None
+    controller = _get_controller()
+    admitted = session.get("surge_admitted", [])
+    if quiz_id in admitted:
+        return None  # Already let in once: reloads and resumed attempts skip the queue
+
+    now = time.time()
+    ticket = session.get("surge_ticket")
+    if ticket and ticket["quiz_id"] == quiz_id:
+        start = ticket["at"]
+        if start <= now:
+            controller.redeem()
+            _count(surge, "admitted_from_queue")
+            session.pop("surge_ticket")
+            session["surge_admitted"] = admitted + [quiz_id]
+            return None
+    else:
+        start = controller.reserve(now, current_app.config["SURGE_MAX_WAIT"])
+        if start is not None and start <= now:
+            _count(surge, "admitted")
+            session["surge_admitted"] = admitted + [quiz_id]
+            return None
+        if start is not None:
+            _count(surge, "queued")
+            session["surge_ticket"] = {"quiz_id": quiz_id, "at": start}
+
+    wait = max(1, math.ceil(start - now)) if start is not None else current_app.config["SURGE_MAX_WAIT"]
+    position = controller.queue_length(now) if start is None else max(1, math.ceil((start - now) / controller.interval))
+    response = current_app.make_response((render_template("user/please_wait.html", quiz=surge.meta, wait=wait,
+                                                          position=position, queued=start is not None), 503))
+    response.headers["Retry-After"] = str(wait)
+    response.cache_control.no_store = True
+    return response
+
+
+def surge_stats():
+    # Flat numbers for /admin/metrics (this worker's queue)
+    now = time.time()
+    stats = dict(_controller.snapshot(now)) if _controller else {}
+    stats["active_surges"] = sum(1 for until in list(_marked().values()) if until > now)
+    return stats
+
+
+def active_surges():
+    # [(meta, seconds_left, warmed_questions, stats)] for the admin page; warms them in this worker
+    now = time.time()
+    surges = [surge for surge in map(_active, sorted(_marked())) if surge is not None]
+    with _lock:
+        return [(surge.meta, int(surge.until - now), len(surge.questions), dict(surge.stats)) for surge in surges]
@@ -0,0 +1,103 @@
+import random
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from models import db, User, Branch, Subject, Chapter, Quiz, Question, Score, Response
+from user_stats import rebuild_user_stats
+from leaderboards import rebuild_leaderboards
+from dashboard import invalidate_dashboard
+from answer_keys import clear_answer_keys
+
+# ⪼ Seeded synthetic dataset
+# Builds a reproducible branch -> subject -> chapter -> quiz -> question tree, users and scores at a
+# chosen scale, for benchmarking. Everything is inserted with Core executemany in chunks.
+# All synthetic users share one password (SYNTHETIC_PASSWORD) so hashing doesn't dominate.
+
+SYNTHETIC_PASSWORD = "synthetic-pass"
+CHUNK = 10000
+
+
+def _insert(model, rows):
+    for start in range(0, len(rows), CHUNK):
+        db.session.execute(insert(model.__table__), rows[start:start + CHUNK])
+
+
+def _new_ids(model, name_column, prefix):
+    return [row[0] for row in db.session.query(model.id).filter(name_column.like(f"{prefix}%")).order_by(model.id)]
+
+
+def generate_dataset(seed=42, branches=4, subjects_per_branch=5, chapters_per_subject=4, quizzes_per_chapter=3,
+                     questions_per_quiz=20, users=1000, scores=10000, responses=False, prefix="syn"):
+    rng = random.Random(seed)
+    tag = f"{prefix}{seed}-"
+
+    _insert(Branch, [{"name": f"{tag}branch-{b}"} for b in range(branches)])
+    branch_ids = _new_ids(Branch, Branch.name, tag)
+
+    _insert(Subject, [{"name": f"{tag}subject-{b}-{s}", "branch_id": branch_id}
+                      for b, branch_id in enumerate(branch_ids) for s in range(subjects_per_branch)])
+    subjects = db.session.query(Subject.id, Subject.branch_id).filter(Subject.name.like(f"{tag}%")).order_by(Subject.id).all()
+
+    _insert(Chapter, [{"name": f"{tag}chapter-{subject_id}-{c}", "subject_id": subject_id}
+                      for subject_id, _ in subjects for c in range(chapters_per_subject)])
+    chapters = db.session.query(Chapter.id, Chapter.subject_id).filter(Chapter.name.like(f"{tag}%")).order_by(Chapter.id).all()
+
+    _insert(Quiz, [{"name": f"{tag}quiz-{chapter_id}-{q}", "chapter_id": chapter_id, "subject_id": subject_id,
+                    "nos": questions_per_quiz, "time": 600}
+                   for chapter_id, subject_id in chapters for q in range(quizzes_per_chapter)])
+    quizzes = db.session.query(Quiz.id, Quiz.subject_id).filter(Quiz.name.like(f"{tag}%")).order_by(Quiz.id).all()
+
+    _insert(Question, [{"quiz_id": quiz_id, "question_text": f"Synthetic question {n} of quiz {quiz_id}?",
+                        "option1": "Option A", "option2": "Option B", "option3": "Option C", "option4": "Option D",
+                        "ans": rng.randint(1, 4), "marks": rng.choice((1, 1, 1, 2))}
+                       for quiz_id, _ in quizzes for n in range(questions_per_quiz)])
+
+    password_hash = generate_password_hash(SYNTHETIC_PASSWORD)
+    _insert(User, [{"username": f"{tag}user{u}@example.com", "email": f"{tag}user{u}@example.com",
+                    "name": f"Synthetic User {u}", "branch_id": rng.choice(branch_ids),
+                    "password_hash": password_hash, "is_admin": False} for u in range(users)])
+    user_rows = db.session.query(User.id, User.branch_id).filter(User.username.like(f"{tag}%")).all()
+
+    # Scores: each user attempts quizzes of their own branch
+    quizzes_by_branch = {}
+    subject_branch = dict(subjects)
+    for quiz_id, subject_id in quizzes:
+        quizzes_by_branch.setdefault(subject_branch[subject_id], []).append(quiz_id)
+
+    # Each attempt's selections are drawn first and its score is graded from them, so `flask regrade --all`
+    # on a dataset generated with responses=True finds nothing to change
+    questions = {}
+    for question_id, quiz_id, ans, marks in db.session.query(Question.id, Question.quiz_id, Question.ans, Question.marks) \
+            .filter(Question.quiz_id.in_([q for q, _ in quizzes])).order_by(Question.id):
+        questions.setdefault(quiz_id, []).append((question_id, ans, marks))
+
+    for start in range(0, scores, CHUNK):
+        batch, selections = [], []
+        for _ in range(min(CHUNK, scores - start)):
+            user_id, branch_id = rng.choice(user_rows)
+            quiz_id = rng.choice(quizzes_by_branch[branch_id])
+            selected = [ans if rng.random() < 0.6 else rng.randint(1, 4) for _, ans, _ in questions[quiz_id]]
+            score = sum(marks for (_, ans, marks), choice in zip(questions[quiz_id], selected) if choice == ans)
+            batch.append({"user_id": user_id, "quiz_id": quiz_id, "score": score})
+            selections.append(selected)
+        if not responses:
+            db.session.execute(insert(Score.__table__), batch)
+        else:
+            score_ids = db.session.execute(
+                insert(Score).returning(Score.id, sort_by_parameter_order=True), batch
+            ).scalars().all()
+            db.session.execute(insert(Response.__table__), [
+                    {"score_id": score_id, "question_id": question_id, "selected": choice}
+                    for score_id, row, selected in zip(score_ids, batch, selections)
+                    for (question_id, _, _), choice in zip(questions[row["quiz_id"]], selected)
+                ])
+        db.session.commit()
+
+    rebuild_user_stats()
+    rebuild_leaderboards()
+    db.session.commit()
+    invalidate_dashboard()
+    clear_answer_keys()
+
+    return {"branches": len(branch_ids), "subjects": len(subjects), "chapters": len(chapters),
+            "quizzes": len(quizzes), "questions": len(quizzes) * questions_per_quiz,
+            "users": len(user_rows), "scores": scores, "tag": tag}
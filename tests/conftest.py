@@ -0,0 +1,93 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# ⪼ The app reads its config from the environment at import: point it at a throwaway database first
+_tmp = tempfile.mkdtemp(prefix="quizles-tests-")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["JINJA_BYTECODE_CACHE_DIR"] = os.path.join(_tmp, "jinja_cache")
+os.environ["PROFILE_DIR"] = os.path.join(_tmp, "profiles")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flask_app  # noqa: E402
+from models import db, create_admin, Branch, Subject, Chapter, Quiz, Question, User  # noqa: E402
+import answer_keys, identity_cache, leaderboards, surge, dashboard  # noqa: E402
+from fragment_cache import fragments  # noqa: E402
+
+STUDENT_PASSWORD = "password1"
+
+
+def _reset_caches():
+    # Per-process caches would otherwise carry rows of the previous test's database
+    answer_keys.invalidate_answer_key(*list(answer_keys._keys))
+    identity_cache._identities.clear()
+    leaderboards._boards.clear()
+    leaderboards._reloading.clear()
+    surge._surges.clear()
+    surge._marks.update(quizzes={}, checked=0.0)
+    surge._controller = None
+    fragments.clear()
+    dashboard._cache["data"] = None
+
+
+@pytest.fixture
+def app():
+    config = dict(flask_app.config)
+    flask_app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, SCORE_WRITE_BEHIND=False)
+    with flask_app.app_context():
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+        create_admin()
+    _reset_caches()
+    yield flask_app
+    _reset_caches()
+    flask_app.config.update(config)  # Undo per-test settings
+
+
+@pytest.fixture
+def quiz(app):
+    # Branch 1 > Math > Algebra > quiz "Q1": 3 questions (answers 1, 2, 3; marks 1, 2, 3), nos=3
+    with app.app_context():
+        branch = Branch(id=1, name="CSE")
+        subject = Subject(name="Math", branch=branch)
+        chapter = Chapter(name="Algebra", subject=subject)
+        db.session.add_all([branch, subject, chapter])
+        db.session.flush()
+        quiz = Quiz(name="Q1", chapter_id=chapter.id, subject_id=subject.id, nos=3, time=600)
+        db.session.add(quiz)
+        db.session.flush()
+        db.session.add_all([
+            Question(quiz_id=quiz.id, question_text=f"Question {i}", option1="a", option2="b", option3="c",
+                     option4="d", ans=i, marks=i)
+            for i in (1, 2, 3)
+        ])
+        db.session.commit()
+        return quiz.id
+
+
+def add_student(app, username, branch_id=1):
+    with app.app_context():
+        user = User(username=username, name=username, email=f"{username}@example.com", branch_id=branch_id)
+        user.set_password(STUDENT_PASSWORD)
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def login(client, username, password=STUDENT_PASSWORD):
+    response = client.post("/login", data={"username": username, "password": password})
+    assert response.status_code == 302 and "/login" not in response.headers["Location"]
+    return client
+
+
+@pytest.fixture
+def student(app, quiz):
+    add_student(app, "student")
+    return login(app.test_client(), "student")
+
+
+@pytest.fixture
+def admin(app):
+    return login(app.test_client(), "admin", "admin123")
@@ -0,0 +1,15 @@
+from models import db, Question
+from answer_keys import get_answer_key, grade_submission
+
+
+def test_key_edited_through_another_worker_is_recompiled(app, quiz):
+    with app.app_context():
+        key = get_answer_key(quiz)
+        assert grade_submission(key, {"question_1": "1", "question_2": "2", "question_3": "3"}) == 6
+        assert get_answer_key(quiz) is key
+
+        # Another worker edits the question: only Quiz.version tells this one
+        db.session.get(Question, 1).ans = 4
+        db.session.commit()
+        key = get_answer_key(quiz)
+        assert grade_submission(key, {"question_1": "4", "question_2": "2", "question_3": "3"}) == 6
@@ -0,0 +1,25 @@
+from models import db, QuizAttempt
+from conftest import add_student
+
+
+def _attempts(app):
+    with app.app_context():
+        return db.session.query(QuizAttempt.id, QuizAttempt.submitted_at.is_(None)).order_by(QuizAttempt.id).all()
+
+
+def test_revalidating_a_quiz_opens_no_attempt(app, quiz):
+    add_student(app, "api-student")
+    client = app.test_client()
+    assert client.post("/api/v1/session", json={"username": "api-student", "password": "password1"}).status_code == 200
+
+    first = client.get(f"/api/v1/quizzes/{quiz}")
+    etag = first.headers["ETag"]
+    assert client.get(f"/api/v1/quizzes/{quiz}", headers={"If-None-Match": etag}).status_code == 304
+    assert _attempts(app) == [(first.get_json()["attempt_id"], True)]
+
+    # Once that attempt is submitted the cached copy is stale: the next fetch opens one new attempt
+    client.post(f"/api/v1/quizzes/{quiz}/submissions", json={"attempt_id": first.get_json()["attempt_id"], "answers": {}})
+    second = client.get(f"/api/v1/quizzes/{quiz}", headers={"If-None-Match": etag})
+    assert second.status_code == 200 and second.headers["ETag"] != etag
+    assert client.get(f"/api/v1/quizzes/{quiz}", headers={"If-None-Match": second.headers["ETag"]}).status_code == 304
+    assert [open_ for _, open_ in _attempts(app)] == [False, True]
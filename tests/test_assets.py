@@ -0,0 +1,16 @@
+import re
+
+
+def _stylesheets(response):
+    return re.findall(r'href="/static/(css/[^"?]+)\?v=\w+"', response.get_data(as_text=True))
+
+
+def test_admin_pages_load_the_shared_sheet_before_their_own(admin, student, quiz):
+    assert _stylesheets(admin.get("/admin/manage_quiz")) == ["css/admin/admin.css", "css/admin/manage_quiz.css",
+                                                             "css/layout.css"]
+    assert "css/admin/admin.css" not in _stylesheets(student.get(f"/start_quiz/{quiz}"))
+
+
+def test_fingerprinted_stylesheets_are_cached_immutably(admin):
+    url = re.search(r'href="(/static/css/admin/admin\.css\?v=\w+)"', admin.get("/admin/manage_user").get_data(as_text=True))
+    assert "immutable" in admin.get(url.group(1)).headers["Cache-Control"]
@@ -0,0 +1,31 @@
+from models import db, User, Quiz, Score
+from synthetic_data import SYNTHETIC_PASSWORD, generate_dataset
+from benchmark import run_benchmark
+from regrade import regrade_quiz
+
+
+def test_student_routes_run_as_the_student(app, quiz):
+    with app.app_context():
+        student = User(username="bench-student", name="Bench", email="bench@example.com", branch_id=1)
+        student.set_password(SYNTHETIC_PASSWORD)
+        db.session.add(student)
+        db.session.commit()
+        student_id = student.id
+
+    # Like `flask bench` used to: an app context already pushed around the whole run
+    with app.app_context():
+        results = run_benchmark(app, tag="bench-", iterations=2, warmup=1, include_writes=True)
+
+    assert set(results["routes"]) == {"homepage", "quiz", "profile", "admin_dashboard", "manage_question", "quiz_submit"}
+    with app.app_context():
+        assert {row.user_id for row in db.session.query(Score.user_id)} == {student_id}
+
+
+def test_synthetic_scores_match_their_responses(app):
+    with app.app_context():
+        info = generate_dataset(branches=1, subjects_per_branch=1, chapters_per_subject=1, quizzes_per_chapter=2,
+                                questions_per_quiz=5, users=10, scores=50, responses=True)
+        quiz_ids = [q for q, in db.session.query(Quiz.id).filter(Quiz.name.like(f"{info['tag']}%"))]
+        results = [regrade_quiz(quiz_id) for quiz_id in quiz_ids]
+    assert sum(r["regradable"] for r in results) == 50
+    assert sum(r["changed"] for r in results) == 0
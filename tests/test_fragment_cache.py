@@ -0,0 +1,28 @@
+import re
+from sqlalchemy import update
+from models import db, Chapter, Quiz, Question
+
+
+def _row_quiz_names(response):
+    return re.findall(r'value="\d+" form="bulkForm"></td>\s*<td>([^<]*)</td>', response.get_data(as_text=True))
+
+
+def test_question_row_follows_a_move_to_another_quiz(app, admin, quiz):
+    with app.app_context():
+        chapter = Chapter.query.first()
+        other = Quiz(name="Other quiz", chapter_id=chapter.id, subject_id=chapter.subject_id, nos=1, time=60)
+        db.session.add(other)
+        db.session.flush()
+        version = db.session.get(Quiz, quiz).version
+        db.session.execute(update(Quiz).where(Quiz.id == other.id).values(version=version - 1))
+        db.session.commit()
+        other_id = other.id
+
+    assert _row_quiz_names(admin.get("/admin/manage_question"))[0] != "Other quiz"
+
+    # The move bumps both quizzes, which leaves the other quiz at the version the row was cached with
+    with app.app_context():
+        db.session.get(Question, 1).quiz_id = other_id
+        db.session.commit()
+        assert db.session.get(Quiz, other_id).version == version
+    assert _row_quiz_names(admin.get("/admin/manage_question"))[0] == "Other quiz"
@@ -0,0 +1,78 @@
+import time
+import leaderboards
+from models import db, Chapter, Quiz, Question, LeaderboardEntry
+from leaderboards import QUIZ, BRANCH, RankIndex, rank, top, rebuild_leaderboards
+from score_writer import Attempt, record_score
+from conftest import add_student
+
+
+def _play(app, user_id, quiz_id, score):
+    with app.app_context():
+        record_score(app, Attempt(user_id, quiz_id, 1, score, []))
+
+
+def _board_rows(app):
+    with app.app_context():
+        return sorted(db.session.query(LeaderboardEntry.board, LeaderboardEntry.board_id,
+                                       LeaderboardEntry.user_id, LeaderboardEntry.score))
+
+
+def test_rank_index_counts_users_above_a_score():
+    index = RankIndex(capacity=4)
+    for score in (3, 5, 5, 1, 40):  # 40 grows the tree
+        index.add(score)
+    assert index.count_above(5) == 1
+    assert index.count_above(3) == 3
+    assert index.count_above(0) == 5
+    index.add(5, -1)
+    assert index.count_at(5) == 1 and index.total == 4
+
+
+def test_ranks_follow_personal_bests(app, quiz):
+    ann, bob, cat = (add_student(app, name) for name in ("ann", "bob", "cat"))
+    _play(app, ann, quiz, 3)
+    _play(app, bob, quiz, 5)
+    _play(app, cat, quiz, 1)
+
+    with app.app_context():
+        assert rank(QUIZ, quiz, ann) == {"rank": 2, "score": 3, "players": 3}
+        time.sleep(0.2)  # Let the background load land, so the next reads use the in-memory index
+
+    _play(app, ann, quiz, 6)  # New best: moves to the top
+    _play(app, bob, quiz, 2)  # Not a best: nothing moves
+    with app.app_context():
+        assert rank(QUIZ, quiz, ann) == {"rank": 1, "score": 6, "players": 3}
+        assert rank(QUIZ, quiz, bob) == {"rank": 2, "score": 5, "players": 3}
+        assert rank(BRANCH, 1, ann)["score"] == 6
+        assert [row["user_id"] for row in top(QUIZ, quiz, k=2)] == [ann, bob]
+        # The in-memory index and the table agree
+        for user_id in (ann, bob, cat):
+            assert rank(QUIZ, quiz, user_id) == leaderboards._rank_from_table(QUIZ, quiz, user_id)
+
+
+def test_branch_board_sums_bests_over_quizzes(app, quiz):
+    with app.app_context():
+        chapter = Chapter.query.first()
+        second = Quiz(name="Q2", chapter_id=chapter.id, subject_id=chapter.subject_id, nos=1, time=60)
+        db.session.add(second)
+        db.session.flush()
+        db.session.add(Question(quiz_id=second.id, question_text="Q", option1="a", option2="b", option3="c",
+                                option4="d", ans=1, marks=4))
+        db.session.commit()
+        second_id = second.id
+    ann, bob = add_student(app, "ann"), add_student(app, "bob")
+    _play(app, ann, quiz, 2)
+    _play(app, ann, quiz, 5)
+    _play(app, ann, second_id, 4)
+    _play(app, bob, quiz, 6)
+
+    with app.app_context():
+        assert rank(BRANCH, 1, ann) == {"rank": 1, "score": 9, "players": 2}
+        assert rank(BRANCH, 1, bob) == {"rank": 2, "score": 6, "players": 2}
+
+    # A rebuild from Score with window functions gives the same boards as the incremental updates
+    incremental = _board_rows(app)
+    with app.app_context():
+        rebuild_leaderboards()
+        db.session.commit()
+    assert _board_rows(app) == incremental
@@ -0,0 +1,55 @@
+import re
+from models import db, Quiz, Question, QuizAttempt, Score
+from conftest import add_student
+
+
+def _attempt_id(response):
+    return int(re.search(r'name="attempt_id" value="(\d+)"', response.get_data(as_text=True)).group(1))
+
+
+def _scores(app):
+    with app.app_context():
+        return db.session.query(Score.user_id, Score.quiz_id, Score.score).order_by(Score.id).all()
+
+
+def test_sampled_attempt_is_graded_on_its_draw(app, student, quiz):
+    with app.app_context():
+        db.session.add_all([Question(quiz_id=quiz, question_text=f"Extra {i}", option1="a", option2="b",
+                                     option3="c", option4="d", ans=1, marks=10) for i in range(5)])
+        db.session.get(Quiz, quiz).nos = 2
+        db.session.commit()
+
+    page = student.get(f"/quiz/{quiz}")
+    shown = sorted(int(qid) for qid in set(re.findall(r'name="question_(\d+)"', page.get_data(as_text=True))))
+    assert len(shown) == 2
+
+    attempt_id = _attempt_id(page)
+    with app.app_context():
+        attempt = db.session.get(QuizAttempt, attempt_id)
+        assert [int(qid) for qid in attempt.question_ids.split(",")] == shown
+        answers = {qid: db.session.get(Question, qid).ans for qid in range(1, 9)}
+        expected = sum(db.session.get(Question, qid).marks for qid in shown)
+
+    # Every question of the bank answered correctly: only the drawn ones count
+    form = {f"question_{qid}": str(ans) for qid, ans in answers.items()}
+    student.post(f"/quiz/{quiz}", data=dict(form, attempt_id=str(attempt_id)))
+    assert _scores(app)[-1][2] == expected
+
+
+def test_api_uses_the_same_attempt_and_draw(app, quiz):
+    add_student(app, "api-student")
+    client = app.test_client()
+    assert client.post("/api/v1/session", json={"username": "api-student", "password": "password1"}).status_code == 200
+
+    payload = client.get(f"/api/v1/quizzes/{quiz}").get_json()
+    assert [q["id"] for q in payload["questions"]] == [1, 2, 3]
+
+    submitted = client.post(f"/api/v1/quizzes/{quiz}/submissions",
+                            json={"attempt_id": payload["attempt_id"], "answers": {"1": 1, "2": 2, "3": 3}})
+    assert submitted.status_code == 201
+    assert submitted.get_json()["score"] == 6 and submitted.get_json()["total_marks"] == 6
+
+    again = client.post(f"/api/v1/quizzes/{quiz}/submissions",
+                        json={"attempt_id": payload["attempt_id"], "answers": {"1": 1}})
+    assert again.status_code == 409
+    assert len(_scores(app)) == 1
@@ -0,0 +1,53 @@
+import re
+import pytest
+import quiz_attempts
+from models import db, QuizAttempt, Score
+from quiz_attempts import open_attempt, submit_attempt
+from conftest import add_student
+
+
+def _attempt_id(response):
+    return int(re.search(r'name="attempt_id" value="(\d+)"', response.get_data(as_text=True)).group(1))
+
+
+def _scores(app):
+    with app.app_context():
+        return db.session.query(Score.user_id, Score.quiz_id, Score.score).order_by(Score.id).all()
+
+
+def test_reload_resumes_the_same_attempt(student, quiz):
+    first = _attempt_id(student.get(f"/quiz/{quiz}"))
+    assert _attempt_id(student.get(f"/quiz/{quiz}")) == first
+
+
+def test_submit_records_one_score_for_the_student(app, student, quiz):
+    attempt_id = _attempt_id(student.get(f"/quiz/{quiz}"))
+    answers = {"attempt_id": str(attempt_id), "question_1": "1", "question_2": "2", "question_3": "4"}
+
+    response = student.post(f"/quiz/{quiz}", data=answers)
+    assert response.status_code == 302 and response.headers["Location"].endswith(f"/end_quiz/{quiz}/3")
+
+    # A retry or a second tab posting the same attempt is graded once
+    student.post(f"/quiz/{quiz}", data=answers)
+    with app.app_context():
+        student_id = db.session.get(QuizAttempt, attempt_id).user_id
+    assert _scores(app) == [(student_id, quiz, 3)]
+
+
+def test_failed_score_write_leaves_the_attempt_open(app, quiz, monkeypatch):
+    user_id = add_student(app, "student")
+    with app.app_context():
+        attempt = open_attempt(user_id, quiz)
+
+        def fail(attempts):
+            raise RuntimeError("disk I/O error")
+
+        monkeypatch.setattr(quiz_attempts, "write_attempts", fail)
+        with pytest.raises(RuntimeError):
+            submit_attempt(app, attempt, 1, form={"question_1": "1"})
+        monkeypatch.undo()
+
+        db.session.expire_all()
+        assert db.session.get(QuizAttempt, attempt.id).submitted_at is None
+        assert submit_attempt(app, attempt, 1, form={"question_1": "1"}) == 1
+    assert _scores(app) == [(user_id, quiz, 1)]
@@ -0,0 +1,90 @@
+import time
+import surge
+from models import db, Question, QuizSurge
+from surge import AdmissionController
+from conftest import add_student, login
+
+
+def test_controller_admits_the_burst_then_queues_in_order():
+    controller = AdmissionController(rate=2, burst=2)
+    now = 1000.0
+    starts = [controller.reserve(now, max_wait=10) for _ in range(5)]
+
+    assert starts[:2] == [now - 0.5, now]  # The burst goes straight in
+    assert starts[2:] == [now + 0.5, now + 1.0, now + 1.5]  # Then one slot every 1/rate seconds
+    assert controller.queue_length(now) == 3
+    assert controller.queue_length(now + 1.5) == 0
+
+
+def test_controller_turns_away_requests_beyond_max_wait():
+    controller = AdmissionController(rate=1, burst=1)
+    assert controller.reserve(0.0, max_wait=1) <= 0.0
+    assert controller.reserve(0.0, max_wait=1) == 1.0
+    assert controller.reserve(0.0, max_wait=1) is None  # Would wait 2s; holds no slot
+    assert controller.snapshot(0.0)["turned_away"] == 1
+
+
+def _surging_students(app, admin, quiz, count):
+    app.config.update(SURGE_RATE=1, SURGE_BURST=1, SURGE_MAX_WAIT=30, SURGE_WORKERS=1, SURGE_POLL_SECONDS=0)
+    assert admin.post("/admin/surge", data={"action": "start", "quiz_id": str(quiz)}).status_code == 302
+    clients = []
+    for i in range(count):
+        add_student(app, f"student{i}")
+        clients.append(login(app.test_client(), f"student{i}"))
+    return clients
+
+
+def test_starts_above_the_rate_get_a_retry_page(app, admin, quiz):
+    clients = _surging_students(app, admin, quiz, 3)
+    responses = [client.get(f"/quiz/{quiz}") for client in clients]
+
+    assert [r.status_code for r in responses] == [200, 503, 503]
+    assert [int(r.headers["Retry-After"]) for r in responses[1:]] == [1, 2]
+    assert responses[1].headers["Cache-Control"] == "no-store"
+
+    # Once the reserved slot comes up the ticket is redeemed, and a reload skips the queue
+    time.sleep(1.1)
+    assert clients[1].get(f"/quiz/{quiz}").status_code == 200
+    assert clients[1].get(f"/quiz/{quiz}").status_code == 200
+
+
+def test_surge_is_shared_through_the_database(app, admin, quiz):
+    _surging_students(app, admin, quiz, 0)
+    with app.app_context():
+        assert db.session.query(QuizSurge.quiz_id).all() == [(quiz,)]
+
+    # A worker that didn't handle the admin's request: nothing warmed, no controller yet
+    surge._surges.clear()
+    surge._marks.update(quizzes={}, checked=0.0)
+    surge._controller = None
+    app.config["SURGE_WORKERS"] = 2
+    add_student(app, "late")
+    assert login(app.test_client(), "late").get(f"/start_quiz/{quiz}").status_code == 200
+    assert quiz in surge._surges
+
+    assert admin.post("/admin/surge", data={"action": "end", "quiz_id": str(quiz)}).status_code == 302
+    with app.app_context():
+        assert QuizSurge.query.count() == 0
+    assert quiz not in surge._surges
+
+
+def test_deleting_a_surging_quiz_ends_its_surge(app, admin, quiz):
+    clients = _surging_students(app, admin, quiz, 1)
+    assert clients[0].get(f"/start_quiz/{quiz}").status_code == 200
+
+    admin.post("/admin/manage_quiz", data={"delete": str(quiz)})
+    assert clients[0].get(f"/start_quiz/{quiz}").status_code == 404
+    assert clients[0].get(f"/quiz/{quiz}").status_code == 404
+    with app.app_context():
+        assert QuizSurge.query.count() == 0
+
+
+def test_edit_through_another_worker_rewarms_the_snapshot(app, admin, quiz):
+    client = _surging_students(app, admin, quiz, 1)[0]
+    assert "Edited question" not in client.get(f"/quiz/{quiz}").get_data(as_text=True)
+
+    # Edited without this worker's answer-key invalidation: only the polled Quiz.version tells it
+    with app.app_context():
+        db.session.get(Question, 1).question_text = "Edited question"
+        db.session.commit()
+    assert "Edited question" in client.get(f"/quiz/{quiz}").get_data(as_text=True)
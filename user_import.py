@@ -0,0 +1,111 @@
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from email_validator import validate_email, EmailNotValidError
+from sqlalchemy import insert, or_
+from werkzeug.security import generate_password_hash
+from models import db, User, Branch
+from dashboard import invalidate_dashboard
+
+# ⪼ Bulk user provisioning (CSV)
+# Columns: username, password, name, email, and branch (name) or branch_id.
+# Password hashing is deliberately slow, so each batch is hashed across all cores in a process pool;
+# username/email conflicts are checked with one set-based query per batch.
+
+MAX_REPORTED_ERRORS = 50
+
+
+def _valid_email(value):
+    try:
+        validate_email(value, check_deliverability=False)
+        return True
+    except EmailNotValidError:
+        return False
+
+
+def validate_user_row(row, branches):
+    # Mirrors UserForm: username and email are e-mail addresses, password at least 8 characters
+    values = {field: (row.get(field) or "").strip() for field in ("username", "password", "name", "email")}
+    if not all(values.values()):
+        return None, "username, password, name and email are required"
+    if len(values["password"]) < 8:
+        return None, "password must be at least 8 characters"
+    if not _valid_email(values["username"]) or not _valid_email(values["email"]):
+        return None, "username and email must be valid e-mail addresses"
+
+    branch_names, branch_ids = branches
+    branch_id = (row.get("branch_id") or "").strip()
+    branch_id = int(branch_id) if branch_id.isdigit() else branch_names.get((row.get("branch") or "").strip())
+    if branch_id not in branch_ids:
+        return None, f"unknown branch {row.get('branch') or row.get('branch_id')!r}"
+
+    values["branch_id"] = branch_id
+    return values, None
+
+
+def _insert_batch(batch, executor, seen, report):
+    # Drop rows that clash with existing users (one query) or with earlier rows in the file
+    usernames = [row["username"] for _, row in batch]
+    emails = [row["email"] for _, row in batch]
+    taken = set()
+    for username, email in db.session.query(User.username, User.email) \
+            .filter(or_(User.username.in_(usernames), User.email.in_(emails))):
+        taken.update((username, email))
+
+    fresh = []
+    for line_number, row in batch:
+        if row["username"] in taken or row["email"] in taken or row["username"] in seen or row["email"] in seen:
+            report["conflicts"] += 1
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append(f"line {line_number}: {row['username']} already exists")
+            continue
+        seen.update((row["username"], row["email"]))
+        fresh.append(row)
+    if not fresh:
+        return
+
+    hashes = executor.map(generate_password_hash, [row["password"] for row in fresh], chunksize=8)
+    db.session.execute(insert(User.__table__), [
+        {"username": row["username"], "email": row["email"], "name": row["name"],
+         "branch_id": row["branch_id"], "password_hash": password_hash, "is_admin": False}
+        for row, password_hash in zip(fresh, hashes)
+    ])
+    db.session.commit()
+    report["imported"] += len(fresh)
+
+
+def import_users(stream, batch_size=500, workers=None, progress=None):
+    started = time.perf_counter()
+    branch_names = {name: branch_id for name, branch_id in db.session.query(Branch.name, Branch.id)}
+    branches = (branch_names, set(branch_names.values()))
+    report = {"imported": 0, "rejected": 0, "conflicts": 0, "errors": []}
+    seen, batch = set(), []
+
+    def rate():
+        return round(report["imported"] / max(time.perf_counter() - started, 1e-9), 1)
+
+    reader = csv.DictReader(stream)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        for row in reader:
+            values, error = validate_user_row(row, branches)
+            if error:
+                report["rejected"] += 1
+                if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                    report["errors"].append(f"line {reader.line_num}: {error}")
+                continue
+            batch.append((reader.line_num, values))
+            if len(batch) >= batch_size:
+                _insert_batch(batch, executor, seen, report)
+                batch.clear()
+                if progress:
+                    progress(report["imported"], rate())
+        if batch:
+            _insert_batch(batch, executor, seen, report)
+            if progress:
+                progress(report["imported"], rate())
+
+    invalidate_dashboard()  # Core inserts bypass the ORM write hooks
+    report["seconds"] = round(time.perf_counter() - started, 2)
+    report["users_per_second"] = rate()
+    return report
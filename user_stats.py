@@ -0,0 +1,122 @@
+from sqlalchemy import func, bindparam, delete, insert, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import db, User, Subject, Quiz, Score, UserStats, UserSubjectStats
+
+# ⪼ Per-user stats
+# /profile reads these tables by primary key instead of aggregating the whole Score table.
+
+def _upsert(model, index_elements):
+    # INSERT ... ON CONFLICT DO UPDATE that adds the new counts onto an existing row
+    stmt = sqlite_insert(model)
+    return stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={
+            "attempts": model.attempts + stmt.excluded.attempts,
+            "total_score": model.total_score + stmt.excluded.total_score,
+        }
+    )
+
+
+def record_attempts(attempts):
+    # attempts: [(user_id, subject_id, score), ...]. Runs in the caller's transaction,
+    # after the new Score rows have been flushed.
+    per_user, per_subject = {}, {}
+    for user_id, subject_id, score in attempts:
+        count, total = per_user.get(user_id, (0, 0))
+        per_user[user_id] = (count + 1, total + score)
+        count, total = per_subject.get((user_id, subject_id), (0, 0))
+        per_subject[(user_id, subject_id)] = (count + 1, total + score)
+
+    known = {row[0] for row in db.session.query(UserStats.user_id).filter(UserStats.user_id.in_(per_user))}
+    missing = [user_id for user_id in per_user if user_id not in known]
+    if missing:
+        rebuild_users(missing)  # No stats yet: build them from Score, which already has these attempts
+
+    if known:
+        db.session.execute(_upsert(UserStats, ["user_id"]), [
+            {"user_id": user_id, "attempts": count, "total_score": total}
+            for user_id, (count, total) in per_user.items() if user_id in known
+        ])
+        db.session.execute(_upsert(UserSubjectStats, ["user_id", "subject_id"]), [
+            {"user_id": user_id, "subject_id": subject_id, "attempts": count, "total_score": total}
+            for (user_id, subject_id), (count, total) in per_subject.items() if user_id in known
+        ])
+
+
+def apply_score_changes(subject_id, changes):
+    # changes: [(user_id, score_delta), ...], e.g. after a regrade. Users without stats rows are skipped,
+    # their first profile visit rebuilds them from the (already corrected) Score table.
+    if not changes:
+        return
+    params = [{"uid": user_id, "sid": subject_id, "delta": delta} for user_id, delta in changes]
+    user_stats, subject_stats = UserStats.__table__, UserSubjectStats.__table__
+    db.session.execute(
+        update(user_stats)
+        .where(user_stats.c.user_id == bindparam("uid"))
+        .values(total_score=user_stats.c.total_score + bindparam("delta")),
+        params
+    )
+    db.session.execute(
+        update(subject_stats)
+        .where(subject_stats.c.user_id == bindparam("uid"), subject_stats.c.subject_id == bindparam("sid"))
+        .values(total_score=subject_stats.c.total_score + bindparam("delta")),
+        params
+    )
+
+
+def get_user_stats(user_id):
+    stats = db.session.get(UserStats, user_id)
+    if stats is None:
+        # First visit since the table was introduced: backfill this user once
+        rebuild_users([user_id])
+        db.session.commit()
+        stats = db.session.get(UserStats, user_id)
+    return stats
+
+
+def top_subject(user_id):
+    return db.session.query(Subject.name.label("subject"), UserSubjectStats.total_score.label("score")) \
+        .join(Subject, Subject.id == UserSubjectStats.subject_id) \
+        .filter(UserSubjectStats.user_id == user_id) \
+        .order_by(UserSubjectStats.total_score.desc()) \
+        .first()
+
+
+# ⪼ Rebuild from the Score table
+def rebuild_users(user_ids):
+    totals = db.session.query(Score.user_id, func.count(Score.id), func.coalesce(func.sum(Score.score), 0)) \
+        .filter(Score.user_id.in_(user_ids)) \
+        .group_by(Score.user_id).all()
+    per_subject = db.session.query(Score.user_id, Quiz.subject_id, func.count(Score.id), func.sum(Score.score)) \
+        .join(Quiz, Quiz.id == Score.quiz_id) \
+        .filter(Score.user_id.in_(user_ids)) \
+        .group_by(Score.user_id, Quiz.subject_id).all()
+
+    db.session.execute(delete(UserStats).where(UserStats.user_id.in_(user_ids)))
+    db.session.execute(delete(UserSubjectStats).where(UserSubjectStats.user_id.in_(user_ids)))
+
+    found = {row[0]: row for row in totals}
+    db.session.execute(insert(UserStats), [
+        {"user_id": uid, "attempts": found[uid][1] if uid in found else 0,
+         "total_score": found[uid][2] if uid in found else 0}
+        for uid in user_ids
+    ])
+    if per_subject:
+        db.session.execute(insert(UserSubjectStats), [
+            {"user_id": uid, "subject_id": sid, "attempts": attempts, "total_score": total}
+            for uid, sid, attempts, total in per_subject
+        ])
+
+
+def rebuild_user_stats(batch_size=500):
+    # Walks users in id order, one transaction per batch, so it can run against a live database
+    last_id, rebuilt = 0, 0
+    while True:
+        user_ids = [row.id for row in db.session.query(User.id)
+                    .filter(User.id > last_id).order_by(User.id).limit(batch_size)]
+        if not user_ids:
+            return rebuilt
+        rebuild_users(user_ids)
+        db.session.commit()
+        last_id = user_ids[-1]
+        rebuilt += len(user_ids)